@@ -11,9 +11,8 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import seaborn as sns
-import matplotlib.pyplot as plt
-from datetime import datetime, timedelta
+from datetime import datetime
+import io
 import os
 import sys
 import logging
@@ -40,6 +39,9 @@ except ImportError as e:
     MONTHLY_ANALYSIS_AVAILABLE = False
     st.sidebar.warning("⚠️ 月度分析模块不可用")
 
+# st.fragment (1.37+) 只重跑被装饰的函数；旧版本用experimental_fragment，再旧则退化为普通函数
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
+
 # ======================== 语言管理系统 ========================
 
 # 初始化session state
@@ -69,6 +71,7 @@ TEXTS = {
         'rating_range': '⭐ 评分范围',
         'select_states': '📍 选择州',
         'category_range': '🎁 品类数范围',
+        'apply_filters': '✅ 应用筛选',
         
         # KPI指标
         'total_sellers': '🏪 卖家总数',
@@ -120,6 +123,7 @@ TEXTS = {
         'times': '倍',
         'rating_effect': '评分效应',
         'high_rating_gmv': '高评分GMV是低评分的',
+        'insufficient_data': '筛选后的卖家少于{n}个，样本太少，不生成商业洞察',
         
         # 表格列名
         'seller_count': '数量',
@@ -135,6 +139,7 @@ TEXTS = {
         'filtered_data': '📋 筛选结果数据',
         'export_csv': '📥 导出筛选数据为CSV',
         'download_csv': '下载CSV文件',
+        'top_rows_note': '按GMV显示前{k:,}名卖家，完整数据请导出CSV',
         
         # 页脚
         'footer': '📊 Olist商业智能分析平台 | 基于10万+真实电商数据',
@@ -254,6 +259,7 @@ TEXTS = {
         'rating_range': '⭐ Rating Range',
         'select_states': '📍 Select States',
         'category_range': '🎁 Category Count Range',
+        'apply_filters': '✅ Apply Filters',
         
         # KPI指标
         'total_sellers': '🏪 Total Sellers',
@@ -305,6 +311,7 @@ TEXTS = {
         'times': 'times of single-category',
         'rating_effect': 'Rating Effect',
         'high_rating_gmv': 'High-rating GMV is',
+        'insufficient_data': 'Fewer than {n} sellers match the filters; too few to derive business insights',
         
         # 表格列名
         'seller_count': 'Count',
@@ -320,6 +327,7 @@ TEXTS = {
         'filtered_data': '📋 Filtered Results',
         'export_csv': '📥 Export Filtered Data as CSV',
         'download_csv': 'Download CSV File',
+        'top_rows_note': 'Showing the top {k:,} sellers by GMV; export CSV for the full data',
         
         # 页脚
         'footer': '📊 Olist Business Intelligence Platform | Based on 1.55M+ real e-commerce data',
@@ -424,9 +432,13 @@ TEXTS = {
     }
 }
 
+def current_texts():
+    """当前语言的文本表；渲染函数开头取一次，之后直接T['key']，不必每个标签都读session_state"""
+    return TEXTS[st.session_state.language]
+
 def get_text(key):
     """获取当前语言的文本"""
-    return TEXTS[st.session_state.language].get(key, key)
+    return current_texts().get(key, key)
 
 def show_welcome_modal():
     """显示欢迎弹窗"""
@@ -736,22 +748,23 @@ def create_language_selector():
     
     return st.session_state.language
 
-def classify_seller_tier(row):
-    """卖家分级函数"""
-    gmv = row['total_gmv']
-    orders_count = row['unique_orders']
-    rating = row['avg_review_score']
-    
-    if gmv >= 50000 and orders_count >= 200 and rating >= 4.0:
-        return 'Platinum'
-    elif gmv >= 10000 and orders_count >= 50:
-        return 'Gold'
-    elif gmv >= 2000 and orders_count >= 10:
-        return 'Silver'
-    elif gmv >= 500 and orders_count >= 3:
-        return 'Bronze'
-    else:
-        return 'Basic'
+def classify_seller_tiers(data):
+    """卖家分级函数（整列向量化：每个条件只计算一次，按从高到低的优先级取第一个满足的层级）
+
+    直接产出TIER_DTYPE的分类编码（Basic=0 ... Platinum=4），不经过字符串数组。
+    """
+    gmv = data['total_gmv'].to_numpy()
+    orders_count = data['unique_orders'].to_numpy()
+    rating = data['avg_review_score'].to_numpy()
+    
+    conditions = [
+        (gmv >= 50000) & (orders_count >= 200) & (rating >= 4.0),
+        (gmv >= 10000) & (orders_count >= 50),
+        (gmv >= 2000) & (orders_count >= 10),
+        (gmv >= 500) & (orders_count >= 3),
+    ]
+    codes = np.select(conditions, [4, 3, 2, 1], default=0).astype(np.int8)
+    return pd.Categorical.from_codes(codes, dtype=TIER_DTYPE)
 
 # 页面配置
 st.set_page_config(
@@ -793,92 +806,157 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
+# 层级按从低到高排序的有序分类类型
+TIER_DTYPE = pd.CategoricalDtype(['Basic', 'Bronze', 'Silver', 'Gold', 'Platinum'], ordered=True)
+
+def read_csv_with_parquet_cache(csv_file, columns=None, prepare=None, **read_csv_kwargs):
+    """读取CSV，并在同目录维护一份Parquet副本供后续冷启动直接读取
+
+    副本不存在或比CSV旧时从CSV重建（read_csv_kwargs如parse_dates只在重建时生效）；
+    prepare(df)在写副本前整理列类型，整理后的类型（分类、窄数值类型）随Parquet一并保存，
+    命中副本时不必重新转换。写入失败（如只读文件系统）只记录警告。
+    columns非空时只返回其中文件里存在的列：读Parquet时只解码这些列，副本本身始终保存全部列。
+    """
+    parquet_file = os.path.splitext(csv_file)[0] + '.parquet'
+    if os.path.exists(parquet_file) and os.path.getmtime(parquet_file) >= os.path.getmtime(csv_file):
+        try:
+            if columns is not None:
+                import pyarrow.parquet as pq
+                available = set(pq.read_schema(parquet_file).names)
+                columns = [col for col in columns if col in available]
+            return pd.read_parquet(parquet_file, engine='pyarrow', columns=columns)
+        except Exception as e:
+            logger.warning(f"⚠️ 读取Parquet缓存失败，改读CSV: {e}")
+    
+    df = pd.read_csv(csv_file, **read_csv_kwargs)
+    if prepare is not None:
+        df = prepare(df)
+    try:
+        df.to_parquet(parquet_file, engine='pyarrow', compression='zstd', index=False)
+        logger.info(f"💾 已写入Parquet缓存: {parquet_file}")
+    except Exception as e:
+        logger.warning(f"⚠️ 写入Parquet缓存失败: {e}")
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    return df
+
+def data_version(data_path, file_names=('seller_profile_processed.csv', 'seller_analysis_results.csv')):
+    """数据文件的最新修改时间（默认为两张卖家表）
+
+    作为缓存函数的参数传入：数据文件更新后缓存键随之变化，旧结果自动失效。
+    """
+    mtimes = [
+        os.path.getmtime(f"{data_path}{name}")
+        for name in file_names
+        if os.path.exists(f"{data_path}{name}")
+    ]
+    return max(mtimes, default=0.0)
+
+# 缓存条目上限（缓存跨会话共享、随服务进程常驻，必须有界）：
+# 按数据版本缓存的只需保留当前和上一个版本；按筛选结果指纹缓存的，每个滑块位置都是一个新键
+DATA_VERSION_CACHE_ENTRIES = 2
+FILTER_CACHE_ENTRIES = 64
+
+# 降位宽后的列类型：计数列用窄整数，百分比列（0~100，两位小数，如33.33）用float32
+# （百分比在0~100范围内float32的绝对误差不超过约4e-6，远小于两位小数的显示精度，取整后与float64一致；
+#  GMV/评分保留float64：float32会让GMV总和差1分钱、州均评分的四舍五入结果改变）
+SELLER_DOWNCAST_DTYPES = {
+    'unique_orders': 'int32',
+    'category_count': 'int16',
+    'bad_review_rate': 'float32',
+    'delivery_success_rate': 'float32',
+}
+
+def downcast_seller_columns(df):
+    """原地缩小卖家表数值列的位宽，掩码扫描和聚合读取的字节数减半
+
+    整数目标类型只在原列本身是整数时转换（示例数据等来源可能带小数或缺失值）。
+    """
+    for col, dtype in SELLER_DOWNCAST_DTYPES.items():
+        if col not in df.columns:
+            continue
+        if np.issubdtype(np.dtype(dtype), np.integer) and not pd.api.types.is_integer_dtype(df[col]):
+            continue
+        df[col] = df[col].astype(dtype)
+
+def prepare_seller_table(df):
+    """卖家表的类型整理（原地修改并返回df）
+
+    分组键转为分类类型：groupby/isin直接使用整数编码，不再反复哈希字符串；数值列降位宽。
+    从CSV读取时在写Parquet副本前调用，之后命中副本读到的已是整理后的类型（再调用只是空转换）。
+    """
+    if 'business_tier' in df.columns:
+        df['business_tier'] = df['business_tier'].astype(TIER_DTYPE)
+    if 'seller_state' in df.columns:
+        df['seller_state'] = df['seller_state'].astype('category')
+    downcast_seller_columns(df)
+    return df
+
+# 仪表板用到的卖家列（筛选、KPI、图表、相关矩阵和明细表），其余列不读入
+SELLER_COLUMNS = [
+    'seller_id', 'seller_state', 'business_tier',
+    'total_gmv', 'unique_orders', 'avg_review_score', 'category_count',
+    'avg_shipping_days', 'delivery_success_rate', 'bad_review_rate',
+    'revenue_per_order', 'items_per_order'
+]
+
+@st.cache_data(max_entries=DATA_VERSION_CACHE_ENTRIES)
+def _load_seller(data_path, version):
+    """加载卖家画像与分析结果（体量小，保留cache_data的拷贝语义；version见data_version）"""
+    # 尝试加载处理后的数据
+    seller_profile = None
+    processed_file = f"{data_path}seller_profile_processed.csv"
+    
+    if os.path.exists(processed_file):
+        seller_profile = read_csv_with_parquet_cache(processed_file, columns=SELLER_COLUMNS, prepare=prepare_seller_table)
+        logger.info(f"✅ 成功加载seller_profile_processed.csv: {len(seller_profile)} 条记录")
+    else:
+        # 如果处理后的数据不存在，创建示例数据
+        logger.warning("⚠️ 未找到处理后的数据，使用示例数据")
+        seller_profile = create_sample_data()
+    
+    # 加载分析结果
+    try:
+        analysis_file = f"{data_path}seller_analysis_results.csv"
+        if os.path.exists(analysis_file):
+            seller_analysis = read_csv_with_parquet_cache(analysis_file, columns=SELLER_COLUMNS, prepare=prepare_seller_table)
+            logger.info(f"✅ 成功加载seller_analysis_results.csv: {len(seller_analysis)} 条记录")
+        else:
+            # 如果没有分析结果，创建简单分级
+            logger.info("📊 创建简单分级...")
+            seller_profile['business_tier'] = classify_seller_tiers(seller_profile)
+            seller_analysis = seller_profile
+    except Exception as e:
+        logger.warning(f"⚠️ 加载分析结果失败: {e}")
+        seller_profile['business_tier'] = classify_seller_tiers(seller_profile)
+        seller_analysis = seller_profile
+    
+    # 示例数据、现算分级以及旧版本写入的副本没有经过整理，这里统一整理一次（已整理的列不做转换）
+    prepare_seller_table(seller_profile)
+    prepare_seller_table(seller_analysis)
+    
+    return seller_profile, seller_analysis
+
 def load_data():
-    """加载和缓存数据"""
+    """加载和缓存数据，返回(seller_profile, seller_analysis)"""
     try:
         # 使用智能路径检测来找到数据文件
         data_path = detect_data_path()
         logger.info(f"📂 使用数据路径: {data_path}")
         
-        # 尝试加载处理后的数据
-        seller_profile = None
-        processed_file = f"{data_path}seller_profile_processed.csv"
-        
-        if os.path.exists(processed_file):
-            seller_profile = pd.read_csv(processed_file)
-            logger.info(f"✅ 成功加载seller_profile_processed.csv: {len(seller_profile)} 条记录")
-        else:
-            # 如果处理后的数据不存在，创建示例数据
-            logger.warning("⚠️ 未找到处理后的数据，使用示例数据")
-            seller_profile = create_sample_data()
-        
-        # 尝试加载原始数据用于深度分析
-        orders = None
-        order_items = None
-        reviews = None
-        products = None
-        
-        try:
-            orders_file = f"{data_path}olist_orders_dataset.csv"
-            if os.path.exists(orders_file):
-                orders = pd.read_csv(orders_file)
-                orders['order_purchase_timestamp'] = pd.to_datetime(orders['order_purchase_timestamp'])
-                orders['year_month'] = orders['order_purchase_timestamp'].dt.to_period('M').astype(str)
-                logger.info(f"✅ 成功加载orders: {len(orders)} 条记录")
-        except Exception as e:
-            logger.warning(f"⚠️ 加载orders失败: {e}")
-            
-        try:
-            items_file = f"{data_path}olist_order_items_dataset.csv"
-            if os.path.exists(items_file):
-                order_items = pd.read_csv(items_file)
-                logger.info(f"✅ 成功加载order_items: {len(order_items)} 条记录")
-        except Exception as e:
-            logger.warning(f"⚠️ 加载order_items失败: {e}")
-            
-        try:
-            reviews_file = f"{data_path}olist_order_reviews_dataset.csv"
-            if os.path.exists(reviews_file):
-                reviews = pd.read_csv(reviews_file)
-                logger.info(f"✅ 成功加载reviews: {len(reviews)} 条记录")
-        except Exception as e:
-            logger.warning(f"⚠️ 加载reviews失败: {e}")
-            
-        try:
-            products_file = f"{data_path}olist_products_dataset.csv"
-            if os.path.exists(products_file):
-                products = pd.read_csv(products_file)
-                logger.info(f"✅ 成功加载products: {len(products)} 条记录")
-        except Exception as e:
-            logger.warning(f"⚠️ 加载products失败: {e}")
-        
-        # 加载分析结果
-        try:
-            analysis_file = f"{data_path}seller_analysis_results.csv"
-            if os.path.exists(analysis_file):
-                seller_analysis = pd.read_csv(analysis_file)
-                logger.info(f"✅ 成功加载seller_analysis_results.csv: {len(seller_analysis)} 条记录")
-            else:
-                # 如果没有分析结果，创建简单分级
-                logger.info("📊 创建简单分级...")
-                seller_profile['business_tier'] = seller_profile.apply(classify_seller_tier, axis=1)
-                seller_analysis = seller_profile
-        except Exception as e:
-            logger.warning(f"⚠️ 加载分析结果失败: {e}")
-            seller_profile['business_tier'] = seller_profile.apply(classify_seller_tier, axis=1)
-            seller_analysis = seller_profile
+        seller_profile, seller_analysis = _load_seller(data_path, data_version(data_path))
         
         logger.info(f"🎯 最终数据统计: seller_profile={len(seller_profile)}, seller_analysis={len(seller_analysis)}")
-        return seller_profile, seller_analysis, orders, order_items, reviews, products
+        return seller_profile, seller_analysis
     except Exception as e:
         logger.error(f"❌ 数据加载失败: {e}")
         st.error(f"{get_text('data_load_error')}: {e}")
-        return None, None, None, None, None, None
+        return None, None
 
 def create_sample_data():
     """创建示例数据用于演示"""
-    np.random.seed(42)
+    # 独立的Generator：不重置全局np.random状态，PCG64也比旧的MT19937快
+    rng = np.random.default_rng(42)
     
     # 巴西州名列表
     states = ['SP', 'RJ', 'MG', 'RS', 'PR', 'SC', 'BA', 'GO', 'PE', 'CE', 
@@ -889,69 +967,85 @@ def create_sample_data():
     # 生成示例数据
     data = {
         'seller_id': [f'seller_{i:04d}' for i in range(n_sellers)],
-        'seller_state': np.random.choice(states, n_sellers),
-        'total_gmv': np.random.lognormal(8, 1.5, n_sellers),
-        'unique_orders': np.random.poisson(20, n_sellers) + 1,
-        'avg_review_score': np.random.beta(8, 2, n_sellers) * 5,
-        'category_count': np.random.poisson(2, n_sellers) + 1,
-        'avg_shipping_days': np.random.gamma(2, 3, n_sellers) + 1,
-        'delivery_success_rate': np.random.beta(9, 1, n_sellers),
-        'bad_review_rate': np.random.beta(1, 9, n_sellers),
-        'revenue_per_order': np.random.lognormal(4, 0.8, n_sellers),
-        'items_per_order': np.random.gamma(2, 1, n_sellers) + 1
+        'seller_state': rng.choice(states, n_sellers),
+        'total_gmv': rng.lognormal(8, 1.5, n_sellers),
+        'unique_orders': rng.poisson(20, n_sellers) + 1,
+        'avg_review_score': rng.beta(8, 2, n_sellers) * 5,
+        'category_count': rng.poisson(2, n_sellers) + 1,
+        'avg_shipping_days': rng.gamma(2, 3, n_sellers) + 1,
+        'delivery_success_rate': rng.beta(9, 1, n_sellers),
+        'bad_review_rate': rng.beta(1, 9, n_sellers),
+        'revenue_per_order': rng.lognormal(4, 0.8, n_sellers),
+        'items_per_order': rng.gamma(2, 1, n_sellers) + 1
     }
     
-    df = pd.DataFrame(data)
-    
-    # 确保数据的合理性
-    df['total_gmv'] = np.clip(df['total_gmv'], 100, 1000000)
-    df['unique_orders'] = np.clip(df['unique_orders'], 1, 1000)
-    df['avg_review_score'] = np.clip(df['avg_review_score'], 1, 5)
-    df['category_count'] = np.clip(df['category_count'], 1, 20)
-    df['avg_shipping_days'] = np.clip(df['avg_shipping_days'], 1, 30)
-    df['delivery_success_rate'] = np.clip(df['delivery_success_rate'], 0.5, 1.0)
-    df['bad_review_rate'] = np.clip(df['bad_review_rate'], 0, 0.5)
+    # 确保数据的合理性（建表前在原数组上就地裁剪，不再逐列替换DataFrame的列）
+    clip_bounds = {
+        'total_gmv': (100, 1000000),
+        'unique_orders': (1, 1000),
+        'avg_review_score': (1, 5),
+        'category_count': (1, 20),
+        'avg_shipping_days': (1, 30),
+        'delivery_success_rate': (0.5, 1.0),
+        'bad_review_rate': (0, 0.5)
+    }
+    for col, (lower, upper) in clip_bounds.items():
+        np.clip(data[col], lower, upper, out=data[col])
     
-    return df
+    return pd.DataFrame(data)
 
 def create_sidebar_filters(seller_analysis):
-    """创建侧边栏筛选器"""
-    st.sidebar.markdown(f'<p class="sidebar-header">{get_text("sidebar_title")}</p>', unsafe_allow_html=True)
+    """创建侧边栏筛选器
+
+    所有筛选控件放在一个表单里：拖动滑块不会触发重跑，点击"应用筛选"后才统一提交。
+    """
+    T = current_texts()
+    all_text = T['all']
+    st.sidebar.markdown(f'<p class="sidebar-header">{T["sidebar_title"]}</p>', unsafe_allow_html=True)
+    filter_form = st.sidebar.form('filters')
+    
+    # 滑块边界：每列的min/max只算一次
+    bounds = seller_analysis[['total_gmv', 'avg_review_score', 'category_count']].agg(['min', 'max'])
     
     # 卖家层级筛选
-    tiers = [get_text('all')] + list(seller_analysis['business_tier'].unique())
-    selected_tier = st.sidebar.selectbox(get_text('seller_tier'), tiers)
+    tiers = [all_text] + list(seller_analysis['business_tier'].unique())
+    selected_tier = filter_form.selectbox(T['seller_tier'], tiers)
     
     # GMV范围筛选
-    gmv_min, gmv_max = st.sidebar.slider(
-        get_text('gmv_range'),
-        min_value=float(seller_analysis['total_gmv'].min()),
-        max_value=float(seller_analysis['total_gmv'].max()),
-        value=(float(seller_analysis['total_gmv'].min()), float(seller_analysis['total_gmv'].max())),
+    gmv_lower, gmv_upper = float(bounds.at['min', 'total_gmv']), float(bounds.at['max', 'total_gmv'])
+    gmv_min, gmv_max = filter_form.slider(
+        T['gmv_range'],
+        min_value=gmv_lower,
+        max_value=gmv_upper,
+        value=(gmv_lower, gmv_upper),
         format="%.0f"
     )
     
     # 评分范围筛选
-    rating_min, rating_max = st.sidebar.slider(
-        get_text('rating_range'),
-        min_value=float(seller_analysis['avg_review_score'].min()),
+    rating_lower = float(bounds.at['min', 'avg_review_score'])
+    rating_min, rating_max = filter_form.slider(
+        T['rating_range'],
+        min_value=rating_lower,
         max_value=5.0,
-        value=(float(seller_analysis['avg_review_score'].min()), 5.0),
+        value=(rating_lower, 5.0),
         step=0.1
     )
     
     # 州筛选
-    states = [get_text('all')] + list(seller_analysis['seller_state'].unique())
-    selected_states = st.sidebar.multiselect(get_text('select_states'), states, default=[get_text('all')])
+    states = [all_text] + list(seller_analysis['seller_state'].unique())
+    selected_states = filter_form.multiselect(T['select_states'], states, default=[all_text])
     
     # 品类数筛选
-    category_min, category_max = st.sidebar.slider(
-        get_text('category_range'),
-        min_value=int(seller_analysis['category_count'].min()),
-        max_value=int(seller_analysis['category_count'].max()),
-        value=(int(seller_analysis['category_count'].min()), int(seller_analysis['category_count'].max()))
+    category_lower, category_upper = int(bounds.at['min', 'category_count']), int(bounds.at['max', 'category_count'])
+    category_min, category_max = filter_form.slider(
+        T['category_range'],
+        min_value=category_lower,
+        max_value=category_upper,
+        value=(category_lower, category_upper)
     )
     
+    filter_form.form_submit_button(T['apply_filters'])
+    
     return {
         'tier': selected_tier,
         'gmv_range': (gmv_min, gmv_max),
@@ -961,88 +1055,114 @@ def create_sidebar_filters(seller_analysis):
     }
 
 def apply_filters(data, filters):
-    """应用筛选器"""
-    filtered_data = data.copy()
-    
-    # 层级筛选
-    if filters['tier'] != get_text('all'):
-        filtered_data = filtered_data[filtered_data['business_tier'] == filters['tier']]
-    
-    # GMV筛选
-    filtered_data = filtered_data[
-        (filtered_data['total_gmv'] >= filters['gmv_range'][0]) &
-        (filtered_data['total_gmv'] <= filters['gmv_range'][1])
-    ]
+    """应用筛选器（所有条件合成一个布尔掩码，只做一次行选择）"""
+    all_text = get_text('all')
+    
+    # 数值范围筛选：GMV、评分、品类数
+    gmv = data['total_gmv'].to_numpy()
+    rating = data['avg_review_score'].to_numpy()
+    category_count = data['category_count'].to_numpy()
+    mask = (
+        (gmv >= filters['gmv_range'][0]) & (gmv <= filters['gmv_range'][1]) &
+        (rating >= filters['rating_range'][0]) & (rating <= filters['rating_range'][1]) &
+        (category_count >= filters['category_range'][0]) & (category_count <= filters['category_range'][1])
+    )
     
-    # 评分筛选
-    filtered_data = filtered_data[
-        (filtered_data['avg_review_score'] >= filters['rating_range'][0]) &
-        (filtered_data['avg_review_score'] <= filters['rating_range'][1])
-    ]
+    # 层级筛选（分类列上比较的是整数编码）
+    if filters['tier'] != all_text:
+        mask &= (data['business_tier'] == filters['tier']).to_numpy()
     
     # 州筛选
-    if get_text('all') not in filters['states'] and filters['states']:
-        filtered_data = filtered_data[filtered_data['seller_state'].isin(filters['states'])]
+    if all_text not in filters['states'] and filters['states']:
+        mask &= data['seller_state'].isin(filters['states']).to_numpy()
     
-    # 品类数筛选
-    filtered_data = filtered_data[
-        (filtered_data['category_count'] >= filters['category_range'][0]) &
-        (filtered_data['category_count'] <= filters['category_range'][1])
-    ]
-    
-    return filtered_data
+    return data[mask]
+
+# KPI卡片和商业洞察用到的数值列
+METRIC_COLS = ['total_gmv', 'unique_orders', 'avg_review_score', 'category_count']
+
+def to_column_arrays(data, columns=METRIC_COLS):
+    """把用到的列一次性取成 {列名: ndarray}，后续统计直接走NumPy，不再经过Series"""
+    return {col: data[col].to_numpy() for col in columns}
 
-def display_kpi_metrics(data):
-    """显示KPI指标卡片"""
+# 全量数据的基准值（KPI卡片里的占比分母）
+OVERALL_SELLERS = 3095
+OVERALL_GMV = 13591644
+OVERALL_ORDERS = 100010
+
+def kpi_stats(cols):
+    """一次算出KPI卡片要用的全部标量（cols为to_column_arrays的结果）"""
+    n_sellers = len(cols['total_gmv'])
+    total_gmv = np.nansum(cols['total_gmv'])
+    total_orders = cols['unique_orders'].sum()
+    return {
+        'n_sellers': n_sellers,
+        'seller_share': n_sellers / OVERALL_SELLERS * 100,
+        'total_gmv': total_gmv,
+        'gmv_share': total_gmv / OVERALL_GMV * 100,
+        'avg_rating': np.nanmean(cols['avg_review_score']),
+        'total_orders': total_orders,
+        'order_share': total_orders / OVERALL_ORDERS * 100,
+        'avg_categories': cols['category_count'].mean(),
+    }
+
+def display_kpi_metrics(cols):
+    """显示KPI指标卡片（cols为to_column_arrays的结果）"""
+    T = current_texts()
+    stats = kpi_stats(cols)
     col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
         st.metric(
-            label=get_text("total_sellers"),
-            value=f"{len(data):,}",
-            delta=f"{len(data)/3095*100:.1f}{get_text('percent')} {get_text('of_total')}"
+            label=T['total_sellers'],
+            value=f"{stats['n_sellers']:,}",
+            delta=f"{stats['seller_share']:.1f}{T['percent']} {T['of_total']}"
         )
     
     with col2:
-        total_gmv = data['total_gmv'].sum()
         st.metric(
-            label=get_text("total_gmv"),
-            value=f"R$ {total_gmv:,.0f}",
-            delta=f"{total_gmv/13591644*100:.1f}{get_text('percent')} {get_text('of_total')}"
+            label=T['total_gmv'],
+            value=f"R$ {stats['total_gmv']:,.0f}",
+            delta=f"{stats['gmv_share']:.1f}{T['percent']} {T['of_total']}"
         )
     
     with col3:
-        avg_rating = data['avg_review_score'].mean()
         st.metric(
-            label=get_text("avg_rating"),
-            value=f"{avg_rating:.2f}",
+            label=T['avg_rating'],
+            value=f"{stats['avg_rating']:.2f}",
             delta=f"vs 3.97 overall"
         )
     
     with col4:
-        total_orders = data['unique_orders'].sum()
         st.metric(
-            label=get_text("avg_orders"),
-            value=f"{total_orders:,}",
-            delta=f"{total_orders/100010*100:.1f}{get_text('percent')} {get_text('of_total')}"
+            label=T['avg_orders'],
+            value=f"{stats['total_orders']:,}",
+            delta=f"{stats['order_share']:.1f}{T['percent']} {T['of_total']}"
         )
     
     with col5:
-        avg_categories = data['category_count'].mean()
         st.metric(
-            label=get_text("avg_categories"),
-            value=f"{avg_categories:.1f}",
+            label=T['avg_categories'],
+            value=f"{stats['avg_categories']:.1f}",
             delta=f"vs 2.1 overall"
         )
 
-def create_tier_distribution_chart(data):
-    """创建卖家层级分布图"""
-    tier_stats = data.groupby('business_tier').agg({
-        'seller_id': 'count',
-        'total_gmv': 'sum'
-    }).reset_index()
+# 层级颜色（各图表共用）
+TIER_COLORS = {'Platinum': '#FFD700', 'Gold': '#FFA500', 'Silver': '#C0C0C0', 
+               'Bronze': '#CD7F32', 'Basic': '#808080'}
+# 图例按层级从高到低排列，不随数据中的出现顺序变化
+TIER_LEGEND_ORDER = list(reversed(TIER_DTYPE.categories))
+
+def create_tier_distribution_chart(data, tier_stats=None):
+    """创建卖家层级分布图（tier_stats为compute_tier_stats的结果，未传入时现算）"""
+    if tier_stats is None:
+        tier_stats = compute_tier_stats(data)
+    tier_stats = pd.DataFrame({
+        'Tier': tier_stats.index,
+        'Count': tier_stats[('seller_id', 'count')].to_numpy(),
+        'GMV': tier_stats[('total_gmv', 'sum')].to_numpy()
+    })
     
-    tier_stats.columns = ['Tier', 'Count', 'GMV']
     tier_stats['GMV_Pct'] = tier_stats['GMV'] / tier_stats['GMV'].sum() * 100
     tier_stats['Count_Pct'] = tier_stats['Count'] / tier_stats['Count'].sum() * 100
     
@@ -1053,9 +1173,8 @@ def create_tier_distribution_chart(data):
         specs=[[{"type": "pie"}, {"type": "pie"}]]
     )
     
-    # 颜色映射
-    colors = {'Platinum': '#FFD700', 'Gold': '#FFA500', 'Silver': '#C0C0C0', 
-              'Bronze': '#CD7F32', 'Basic': '#808080'}
+    # 颜色映射（Tier是分类列：map只作用于各类别，再按编码展开）
+    tier_colors = tier_stats['Tier'].map(TIER_COLORS).astype(object).fillna('#1f77b4').tolist()
     
     # 卖家数量饼图
     fig.add_trace(
@@ -1063,7 +1182,7 @@ def create_tier_distribution_chart(data):
             labels=tier_stats['Tier'],
             values=tier_stats['Count'],
             name=get_text('seller_quantity'),
-            marker_colors=[colors.get(tier, '#1f77b4') for tier in tier_stats['Tier']],
+            marker_colors=tier_colors,
             textinfo='label+percent',
             textposition='inside'
         ),
@@ -1076,7 +1195,7 @@ def create_tier_distribution_chart(data):
             labels=tier_stats['Tier'],
             values=tier_stats['GMV'],
             name=get_text('gmv_text'),
-            marker_colors=[colors.get(tier, '#1f77b4') for tier in tier_stats['Tier']],
+            marker_colors=tier_colors,
             textinfo='label+percent',
             textposition='inside'
         ),
@@ -1091,8 +1210,33 @@ def create_tier_distribution_chart(data):
     
     return fig
 
+# 散点图超过该点数时按网格抽稀（当前约3千卖家不触发）
+SCATTER_MAX_POINTS = 5000
+
+def thin_scatter_points(data, x, y, group, bins=200):
+    """按网格抽稀散点：x与log(1+y)各等分bins格，每个(分组, 格子)只保留第一个点
+
+    稀疏区域（含离群点）的点全部保留，只合并密集区域里屏幕上重叠的点；
+    保留的行维持原顺序，图例与颜色不变
+    """
+    def _cells(values):
+        lo, hi = np.nanmin(values), np.nanmax(values)
+        values = np.nan_to_num(values, nan=lo)
+        scale = bins / (hi - lo) if hi > lo else 0.0
+        return np.minimum(((values - lo) * scale).astype(np.int64), bins - 1)
+    
+    x_cells = _cells(data[x].to_numpy(dtype=float))
+    y_cells = _cells(np.log1p(np.clip(data[y].to_numpy(dtype=float), 0, None)))
+    group_codes = pd.factorize(data[group])[0].astype(np.int64) + 1
+    keys = (group_codes * bins + x_cells) * bins + y_cells
+    _, first = np.unique(keys, return_index=True)
+    return data.iloc[np.sort(first)]
+
 def create_gmv_vs_orders_scatter(data):
-    """创建GMV vs 订单数散点图"""
+    """创建GMV vs 订单数散点图（点数超过SCATTER_MAX_POINTS时先抽稀）"""
+    if len(data) > SCATTER_MAX_POINTS:
+        data = thin_scatter_points(data, 'unique_orders', 'total_gmv', 'business_tier')
+    
     # 根据语言设置标签
     labels_dict = {
         'unique_orders': 'Orders' if st.session_state.language == 'en' else '订单数',
@@ -1110,80 +1254,53 @@ def create_gmv_vs_orders_scatter(data):
         hover_data=['seller_state', 'category_count', 'avg_shipping_days'],
         title=get_text('gmv_vs_orders'),
         labels=labels_dict,
-        color_discrete_map={
-            'Platinum': '#FFD700',
-            'Gold': '#FFA500', 
-            'Silver': '#C0C0C0',
-            'Bronze': '#CD7F32',
-            'Basic': '#808080'
-        }
+        color_discrete_map=TIER_COLORS,
+        category_orders={'business_tier': TIER_LEGEND_ORDER},
+        render_mode='webgl'  # 每个卖家一个点：始终用WebGL绘制，不为每个点生成SVG节点
     )
     
     fig.update_layout(height=500)
     return fig
 
-def create_geographic_analysis(data):
-    """创建地理分布分析"""
-    state_stats = data.groupby('seller_state').agg({
-        'seller_id': 'count',
-        'total_gmv': ['sum', 'mean'],
-        'avg_review_score': 'mean',
-        'category_count': 'mean'
-    }).round(2)
-    
-    # 根据语言设置列名
-    if st.session_state.language == 'en':
-        state_stats.columns = ['Seller Count', 'GMV Sum', 'GMV Mean', 'Avg Rating', 'Avg Categories']
-        chart_titles = ('Seller Count Distribution', 'GMV Sum Distribution', 'GMV Mean Distribution', 'Avg Rating Distribution')
-        sort_col = 'GMV Sum'
-    else:
-        state_stats.columns = ['卖家数量', 'GMV总和', 'GMV均值', '平均评分', '平均品类数']
-        chart_titles = ('卖家数量分布', 'GMV总和分布', 'GMV均值分布', '平均评分分布')
-        sort_col = 'GMV总和'
-    
-    state_stats = state_stats.reset_index().sort_values(sort_col, ascending=False).head(15)
+# 地理分布图各分面的标题（与STATE_SUMMARY_COLUMNS / STATE_SUMMARY_LABELS一一对应）
+GEO_CHART_TITLES = {
+    'zh': ('卖家数量分布', 'GMV总和分布', 'GMV均值分布', '平均评分分布'),
+    'en': ('Seller Count Distribution', 'GMV Sum Distribution', 'GMV Mean Distribution', 'Avg Rating Distribution'),
+}
+
+def create_geographic_analysis(data, state_stats=None):
+    """创建地理分布分析（state_stats为compute_state_stats的结果，未传入时现算）"""
+    if state_stats is None:
+        state_stats = compute_state_stats(data)
+    
+    # state_stats已按GMV总和降序排列：先取前15个州，只对图上的4个指标取整并换成显示列名
+    language = st.session_state.language
+    metric_cols = STATE_SUMMARY_LABELS[language]
+    state_stats = state_stats[STATE_SUMMARY_COLUMNS].head(15).round(2)
+    state_stats.columns = metric_cols
+    state_stats = state_stats.reset_index()
+    
+    # 转为长表，用分面代替2×2子图
+    long_stats = state_stats.melt(id_vars='seller_state', value_vars=metric_cols,
+                                  var_name='metric', value_name='value')
     
     # 创建地理分布图
-    fig = make_subplots(
-        rows=2, cols=2,
-        subplot_titles=chart_titles,
-        specs=[[{"type": "bar"}, {"type": "bar"}],
-               [{"type": "bar"}, {"type": "bar"}]]
+    fig = px.bar(
+        long_stats,
+        x='seller_state',
+        y='value',
+        facet_col='metric',
+        facet_col_wrap=2,
+        facet_row_spacing=0.15,
+        color='metric',
+        color_discrete_sequence=['lightblue', 'orange', 'green', 'purple']
     )
     
-    # 获取列名（根据语言）
-    seller_count_col = state_stats.columns[1]  # 卖家数量/Seller Count
-    gmv_sum_col = state_stats.columns[2]       # GMV总和/GMV Sum  
-    gmv_mean_col = state_stats.columns[3]      # GMV均值/GMV Mean
-    avg_rating_col = state_stats.columns[4]    # 平均评分/Avg Rating
-    
-    # 卖家数量
-    fig.add_trace(
-        go.Bar(x=state_stats['seller_state'], y=state_stats[seller_count_col], 
-               name=seller_count_col, marker_color='lightblue'),
-        row=1, col=1
-    )
-    
-    # GMV总和
-    fig.add_trace(
-        go.Bar(x=state_stats['seller_state'], y=state_stats[gmv_sum_col], 
-               name=gmv_sum_col, marker_color='orange'),
-        row=1, col=2
-    )
-    
-    # GMV均值
-    fig.add_trace(
-        go.Bar(x=state_stats['seller_state'], y=state_stats[gmv_mean_col], 
-               name=gmv_mean_col, marker_color='green'),
-        row=2, col=1
-    )
-    
-    # 平均评分
-    fig.add_trace(
-        go.Bar(x=state_stats['seller_state'], y=state_stats[avg_rating_col], 
-               name=avg_rating_col, marker_color='purple'),
-        row=2, col=2
-    )
+    # 各分面量纲不同，y轴独立；分面标题沿用原子图标题
+    fig.update_yaxes(matches=None, showticklabels=True, title_text='')
+    fig.update_xaxes(showticklabels=True, title_text='')
+    subplot_titles = dict(zip(metric_cols, GEO_CHART_TITLES[language]))
+    fig.for_each_annotation(lambda a: a.update(text=subplot_titles[a.text.split('=', 1)[-1]]))
     
     fig.update_layout(
         title_text=get_text('geo_analysis'),
@@ -1193,22 +1310,32 @@ def create_geographic_analysis(data):
     
     return fig
 
-def create_performance_radar(data, all_data=None):
-    """创建性能雷达图"""
-    # 检查当前数据是否只有一个层级
-    unique_tiers = data['business_tier'].nunique()
+# 雷达图指标（顺序与radar_categories文本一致）
+RADAR_COLS = ['total_gmv', 'avg_review_score', 'category_count', 'avg_shipping_days', 'delivery_success_rate']
+
+@st.cache_data(max_entries=DATA_VERSION_CACHE_ENTRIES)
+def _radar_global_bounds(data_path, version):
+    """全量数据雷达指标的min/max，与筛选条件无关，按数据路径和数据版本缓存"""
+    _, seller_analysis = _load_seller(data_path, version)
+    available_cols = [col for col in RADAR_COLS if col in seller_analysis.columns]
+    return seller_analysis[available_cols].agg(['min', 'max'])
+
+def create_performance_radar(data, all_data=None, global_stats=None, tier_stats=None):
+    """创建性能雷达图（tier_stats为compute_tier_stats的结果，未传入时现算）"""
+    if tier_stats is None:
+        tier_stats = compute_tier_stats(data)
+    
+    # 按层级的平均指标
+    tier_performance = tier_stats[[(col, 'mean') for col in RADAR_COLS]].round(2)
+    tier_performance.columns = RADAR_COLS
     
-    # 按层级计算平均指标
-    tier_performance = data.groupby('business_tier').agg({
-        'total_gmv': 'mean',
-        'avg_review_score': 'mean', 
-        'category_count': 'mean',
-        'avg_shipping_days': 'mean',
-        'delivery_success_rate': 'mean'
-    }).round(2)
+    # 检查当前数据是否只有一个层级
+    unique_tiers = len(tier_performance)
     
     # 如果只有一个层级，添加全体平均水平作为对比
     if unique_tiers == 1 and all_data is not None:
+        # 分类索引不能直接追加新标签
+        tier_performance.index = tier_performance.index.astype(str)
         overall_performance = all_data.agg({
             'total_gmv': 'mean',
             'avg_review_score': 'mean', 
@@ -1220,44 +1347,36 @@ def create_performance_radar(data, all_data=None):
         # 添加全体平均到dataframe
         tier_performance.loc[get_text('overall_average')] = overall_performance
     
-    # 获取全局数据范围用于标准化
-    if all_data is not None:
-        # 选择需要的列进行统计
-        required_cols = ['total_gmv', 'avg_review_score', 'category_count', 'avg_shipping_days', 'delivery_success_rate']
-        available_cols = [col for col in required_cols if col in all_data.columns]
+    # 获取全局数据范围用于标准化（优先使用调用方传入的缓存结果）
+    if global_stats is None and all_data is not None:
+        available_cols = [col for col in RADAR_COLS if col in all_data.columns]
         global_stats = all_data[available_cols].agg(['min', 'max'])
-    else:
-        global_stats = None
-    
-    # 标准化数据（0-1）
-    normalized_performance = tier_performance.copy()
-    for col in tier_performance.columns:
-        if global_stats is not None and col in global_stats.columns:
-            min_val = global_stats.loc['min', col]
-            max_val = global_stats.loc['max', col]
-        else:
-            min_val = tier_performance[col].min()
-            max_val = tier_performance[col].max()
-        
-        # 避免除零错误
-        if max_val == min_val:
-            normalized_performance[col] = 0.5  # 设置为中间值
-        else:
-            if col == 'avg_shipping_days':  # 发货天数越少越好
-                normalized_performance[col] = 1 - (tier_performance[col] - min_val) / (max_val - min_val)
-            else:
-                normalized_performance[col] = (tier_performance[col] - min_val) / (max_val - min_val)
+    
+    # 标准化数据（0-1）：整张层级×指标矩阵一次广播完成
+    values = tier_performance.to_numpy(dtype=float)
+    min_vals = np.nanmin(values, axis=0)
+    max_vals = np.nanmax(values, axis=0)
+    if global_stats is not None:
+        bounds = global_stats.reindex(columns=tier_performance.columns)
+        has_bounds = bounds.notna().all().to_numpy()
+        min_vals = np.where(has_bounds, bounds.loc['min'].to_numpy(dtype=float), min_vals)
+        max_vals = np.where(has_bounds, bounds.loc['max'].to_numpy(dtype=float), max_vals)
+    
+    # 避免除零错误
+    flat = max_vals == min_vals
+    normalized = (values - min_vals) / np.where(flat, 1, max_vals - min_vals)
+    invert = (tier_performance.columns == 'avg_shipping_days')  # 发货天数越少越好
+    normalized[:, invert] = 1 - normalized[:, invert]
+    normalized[:, flat] = 0.5  # 设置为中间值
+    # 闭合雷达图：首列追加到末尾，整张矩阵一次完成
+    closed = np.concatenate([normalized, normalized[:, :1]], axis=1)
     
     # 创建雷达图
     fig = go.Figure()
     
     categories = get_text('radar_categories')
-    colors = ['#FFD700', '#FFA500', '#C0C0C0', '#CD7F32', '#808080', '#FF6B6B']
     
-    for i, tier in enumerate(normalized_performance.index):
-        values = normalized_performance.loc[tier].values.tolist()
-        values += values[:1]  # 闭合雷达图
-        
+    for tier, values in zip(tier_performance.index, closed):
         # 为全体平均设置特殊样式
         if tier == get_text('overall_average'):
             fig.add_trace(go.Scatterpolar(
@@ -1274,7 +1393,7 @@ def create_performance_radar(data, all_data=None):
                 theta=categories + [categories[0]],
                 fill='toself',
                 name=tier,
-                line_color=colors[i % len(colors)],
+                line_color=TIER_COLORS.get(tier, '#FF6B6B'),  # 按层级取色，与饼图、散点图一致
                 opacity=0.7
             ))
     
@@ -1303,16 +1422,29 @@ def create_performance_radar(data, all_data=None):
     
     return fig
 
-def create_correlation_heatmap(data):
-    """创建相关性热力图"""
-    # 选择数值型指标
-    numeric_cols = [
-        'total_gmv', 'unique_orders', 'avg_review_score', 
-        'category_count', 'avg_shipping_days', 'bad_review_rate',
-        'revenue_per_order', 'items_per_order'
-    ]
-    
-    correlation_matrix = data[numeric_cols].corr()
+# 相关性热力图使用的数值型指标
+CORR_COLS = [
+    'total_gmv', 'unique_orders', 'avg_review_score', 
+    'category_count', 'avg_shipping_days', 'bad_review_rate',
+    'revenue_per_order', 'items_per_order'
+]
+
+def compute_correlation(data, columns=CORR_COLS):
+    """数值指标的皮尔逊相关矩阵
+
+    无缺失值时直接用np.corrcoef一次矩阵运算；有缺失值时退回pandas，保持其按列对剔除缺失值的语义。
+    """
+    values = data[columns].to_numpy(dtype=np.float64)
+    if np.isnan(values).any():
+        return data[columns].corr()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        matrix = np.corrcoef(values, rowvar=False)
+    return pd.DataFrame(matrix, index=columns, columns=columns)
+
+def create_correlation_heatmap(data, correlation_matrix=None):
+    """创建相关性热力图（可传入预先计算好的相关矩阵）"""
+    if correlation_matrix is None:
+        correlation_matrix = compute_correlation(data)
     
     # 创建热力图
     fig = px.imshow(
@@ -1325,60 +1457,312 @@ def create_correlation_heatmap(data):
     fig.update_layout(height=500)
     return fig
 
-def display_business_insights(data):
-    """显示商业洞察"""
-    st.markdown(f"## {get_text('smart_insights')}")
+def create_binned_histogram(values, bins, title, x_title):
+    """用np.histogram预先分箱，只把各箱计数交给plotly（浏览器收到bins个柱子而不是N个原始值）"""
+    values = values[~np.isnan(values)]
+    counts, edges = np.histogram(values, bins=bins)
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges)
+    ))
+    fig.update_layout(title=title, xaxis_title=x_title, yaxis_title='count', bargap=0)
+    return fig
+
+def create_gmv_histogram(data):
+    """创建GMV分布直方图"""
+    return create_binned_histogram(data['total_gmv'].to_numpy(dtype=float), 50,
+                                   get_text('gmv_histogram'), 'total_gmv')
+
+def create_rating_histogram(data):
+    """创建评分分布直方图"""
+    return create_binned_histogram(data['avg_review_score'].to_numpy(dtype=float), 30,
+                                   get_text('rating_histogram'), 'avg_review_score')
+
+# 可按筛选结果缓存的图表
+CHART_BUILDERS = {
+    'tier_distribution': create_tier_distribution_chart,
+    'gmv_vs_orders': create_gmv_vs_orders_scatter,
+    'geographic': create_geographic_analysis,
+    'performance_radar': create_performance_radar,
+    'correlation_heatmap': create_correlation_heatmap,
+    'gmv_histogram': create_gmv_histogram,
+    'rating_histogram': create_rating_histogram,
+}
+
+def data_fingerprint(data_path, version, data):
+    """筛选结果的指纹
+
+    筛选结果都是同一份卖家表的行子集，数据路径+数据版本+行索引即可确定内容，不必逐值哈希整张表。
+    指纹随滑块位置连续变化，以它为键的缓存都要用FILTER_CACHE_ENTRIES限制条目数。
+    """
+    return data_path, version, pd.util.hash_pandas_object(data.index, index=False).to_numpy().tobytes()
+
+@st.cache_resource(show_spinner=False, max_entries=FILTER_CACHE_ENTRIES)
+def _cached_figure(chart, language, data_key, _data, _kwargs):
+    """按(图表, 语言, 筛选结果指纹)缓存plotly图表
+
+    带下划线的参数不参与哈希：图表内容完全由筛选结果决定，其余参数（全量数据、相关矩阵）都由同一份数据派生。
+    图表建好后只读（st.plotly_chart只调用to_dict），用cache_resource共享同一个对象，
+    命中时不再像cache_data那样反序列化整张图（反序列化会重新走一遍plotly的属性校验）。
+    共享缓存随服务进程常驻，用max_entries限制条目数，超出时淘汰最久未用的图表。
+    """
+    return CHART_BUILDERS[chart](_data, **_kwargs)
+
+def cached_chart(chart, data_key, data, **kwargs):
+    """获取图表（命中缓存时跳过plotly的图表构建）"""
+    return _cached_figure(chart, st.session_state.language, data_key, data, kwargs)
+
+def _binned_means(codes, values, n_bins):
+    """按整数分组编码求各组均值（空组为NaN）"""
+    sums = np.bincount(codes, weights=values, minlength=n_bins)
+    counts = np.bincount(codes, minlength=n_bins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return sums / counts
+
+@st.cache_data(show_spinner=False, max_entries=FILTER_CACHE_ENTRIES)
+def _insight_stats(data_key, _cols):
+    """计算高潜力卖家统计、帕累托比例、多品类效应、评分效应；无法计算的效应返回None
+
+    按筛选结果指纹缓存，_cols不参与哈希，命中时不必逐值哈希各列数组。
+    """
+    # 高潜力卖家：高评分、GMV低于中位数、有一定订单量
+    gmv_median = np.nanmedian(_cols['total_gmv'])
+    high_potential = (
+        (_cols['avg_review_score'] >= 4.2) & 
+        (_cols['total_gmv'] < gmv_median) &
+        (_cols['unique_orders'] >= 5)
+    )
+    n_high_potential = int(high_potential.sum())
+    if n_high_potential > 0:
+        high_potential_rating = _cols['avg_review_score'][high_potential].mean()
+        high_potential_gmv = _cols['total_gmv'][high_potential].mean()
+    else:
+        high_potential_rating = high_potential_gmv = np.nan
+    high_potential_stats = (gmv_median, n_high_potential, high_potential_rating, high_potential_gmv)
+    
+    # 只需要Top 20%的GMV之和，不需要排序：np.partition为O(N)选择
+    gmv = _cols['total_gmv']
+    pareto_threshold = int(len(gmv) * 0.2)
+    split = len(gmv) - pareto_threshold
+    top_20_gmv = np.partition(gmv, split)[split:].sum() if pareto_threshold > 0 else 0.0
+    pareto_ratio = top_20_gmv / gmv.sum() * 100
+    
+    # 多品类效应：0=单品类，1=多品类，2=其他；一次bincount得到各组均值
+    category_count = _cols['category_count']
+    cat_bin = np.where(category_count == 1, 0, np.where(category_count > 1, 1, 2))
+    single_cat, multi_cat, _ = _binned_means(cat_bin, gmv, 3)
+    category_effect = multi_cat / single_cat if single_cat > 0 else None
+    
+    # 评分效应：0=低评分(<3.5)，1=中间，2=高评分(>=4.0)
+    rating = _cols['avg_review_score']
+    rate_bin = np.where(rating >= 4.0, 2, np.where(rating < 3.5, 0, 1))
+    low_rating, _, high_rating = _binned_means(rate_bin, gmv, 3)
+    rating_effect = high_rating / low_rating if low_rating > 0 else None
+    
+    return high_potential_stats, pareto_ratio, category_effect, rating_effect
+
+# 生成商业洞察所需的最少卖家数（中位数、帕累托、分组均值在更小的样本上没有意义）
+MIN_INSIGHT_SELLERS = 20
+
+def display_business_insights(cols, data_key):
+    """显示商业洞察（cols为to_column_arrays的结果，data_key为筛选结果指纹）"""
+    T = current_texts()
+    st.markdown(f"## {T['smart_insights']}")
+    
+    # 样本太少时直接提示，跳过全部统计
+    if len(cols['total_gmv']) < MIN_INSIGHT_SELLERS:
+        st.info(T['insufficient_data'].format(n=MIN_INSIGHT_SELLERS))
+        return
+    
+    # 全部统计按筛选结果缓存，切换语言或重跑片段时不再重新扫描各列
+    high_potential_stats, pareto_ratio, category_effect, rating_effect = _insight_stats(data_key, cols)
+    gmv_median, n_high_potential, high_potential_rating, high_potential_gmv = high_potential_stats
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown('<div class="insight-box">', unsafe_allow_html=True)
-        st.markdown(f"### {get_text('opportunity_id')}")
+        st.markdown(f"### {T['opportunity_id']}")
         
         # 高潜力卖家识别
-        high_potential = data[
-            (data['avg_review_score'] >= 4.2) & 
-            (data['total_gmv'] < data['total_gmv'].median()) &
-            (data['unique_orders'] >= 5)
-        ]
-        
-        st.write(f"**{get_text('high_potential_sellers')}**: {len(high_potential)}{get_text('individual')}")
-        st.write(f"**{get_text('avg_rating_text')}**: {high_potential['avg_review_score'].mean():.2f}")
-        st.write(f"**{get_text('avg_gmv_text')}**: R$ {high_potential['total_gmv'].mean():,.0f}")
+        st.write(f"**{T['high_potential_sellers']}**: {n_high_potential}{T['individual']}")
+        st.write(f"**{T['avg_rating_text']}**: {high_potential_rating:.2f}")
+        st.write(f"**{T['avg_gmv_text']}**: R$ {high_potential_gmv:,.0f}")
         
-        if len(high_potential) > 0:
-            potential_growth = (data['total_gmv'].median() - high_potential['total_gmv'].mean()) * len(high_potential)
-            st.write(f"**{get_text('growth_potential')}**: R$ {potential_growth:,.0f}")
+        if n_high_potential > 0:
+            potential_growth = (gmv_median - high_potential_gmv) * n_high_potential
+            st.write(f"**{T['growth_potential']}**: R$ {potential_growth:,.0f}")
         
         st.markdown('</div>', unsafe_allow_html=True)
     
     with col2:
         st.markdown('<div class="insight-box">', unsafe_allow_html=True)
-        st.markdown(f"### {get_text('key_metrics')}")
+        st.markdown(f"### {T['key_metrics']}")
         
-        # 计算关键比率
-        pareto_threshold = int(len(data) * 0.2)
-        top_20_gmv = data.nlargest(pareto_threshold, 'total_gmv')['total_gmv'].sum()
-        pareto_ratio = top_20_gmv / data['total_gmv'].sum() * 100
-        
-        st.write(f"**{get_text('pareto_ratio')}**: {get_text('top_20_contrib')}{pareto_ratio:.1f}{get_text('percent')}{get_text('gmv_text')}")
+        # 关键比率
+        st.write(f"**{T['pareto_ratio']}**: {T['top_20_contrib']}{pareto_ratio:.1f}{T['percent']}{T['gmv_text']}")
         
         # 多品类效应
-        single_cat = data[data['category_count'] == 1]['total_gmv'].mean()
-        multi_cat = data[data['category_count'] > 1]['total_gmv'].mean()
-        if single_cat > 0:
-            category_effect = multi_cat / single_cat
-            st.write(f"**{get_text('category_effect')}**: {get_text('multi_cat_gmv')}{category_effect:.1f}{get_text('times')}")
+        if category_effect is not None:
+            st.write(f"**{T['category_effect']}**: {T['multi_cat_gmv']}{category_effect:.1f}{T['times']}")
         
         # 评分效应
-        high_rating = data[data['avg_review_score'] >= 4.0]['total_gmv'].mean()
-        low_rating = data[data['avg_review_score'] < 3.5]['total_gmv'].mean()
-        if low_rating > 0:
-            rating_effect = high_rating / low_rating
-            st.write(f"**{get_text('rating_effect')}**: {get_text('high_rating_gmv')}{rating_effect:.1f}{get_text('times')}")
+        if rating_effect is not None:
+            st.write(f"**{T['rating_effect']}**: {T['high_rating_gmv']}{rating_effect:.1f}{T['times']}")
         
         st.markdown('</div>', unsafe_allow_html=True)
 
+def top_k_rows(data, column, k, ascending=False):
+    """按column排序取前k行（默认降序）：np.partition做O(N)选择，只对这k行排序
+
+    与第k名并列的行按原顺序补足，结果与稳定排序后取前k行一致（并列很多时也不会随机挑行）。
+    """
+    values = data[column].to_numpy()
+    key = values if ascending else -values
+    if len(key) > k > 0:
+        kth = np.partition(key, k - 1)[k - 1]
+        if kth == kth:
+            below = np.flatnonzero(key < kth)
+            ties = np.flatnonzero(key == kth)
+        else:
+            # kth为NaN说明非缺失值不足k个：全部非缺失值入选，再按原顺序用缺失值的行补足
+            missing = np.isnan(key)
+            below = np.flatnonzero(~missing)
+            ties = np.flatnonzero(missing)
+        idx = np.concatenate([below, ties[:k - len(below)]])
+    else:
+        idx = np.arange(min(len(key), max(k, 0)))
+    idx = idx[np.argsort(key[idx], kind='stable')]
+    return data.iloc[idx]
+
+def dataframe_to_csv_bytes(data):
+    """将DataFrame编码为CSV字节（PyArrow的C++写出器，不经过pandas的Python字符串）"""
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    
+    buf = io.BytesIO()
+    pacsv.write_csv(pa.Table.from_pandas(data, preserve_index=False), buf)
+    return buf.getvalue()
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _export_csv_bytes(data_key, _data):
+    """导出用的CSV字节，按筛选结果指纹缓存：筛选不变时重复导出不再重新编码
+
+    每个条目是整张筛选表的CSV（可达数MB），而只有当前筛选结果可供下载，只保留最近几份。
+    """
+    return dataframe_to_csv_bytes(_data)
+
+@_fragment
+def render_insights_view(filtered_data, metric_cols, data_key):
+    """商业洞察视图（fragment：导出按钮等页内交互只重跑本函数）"""
+    T = current_texts()
+    display_business_insights(metric_cols, data_key)
+    
+    # 详细数据表
+    st.markdown(f"### {T['filtered_data']}")
+    display_columns = [
+        'seller_id', 'seller_state', 'business_tier', 'total_gmv', 
+        'unique_orders', 'avg_review_score', 'category_count', 'avg_shipping_days'
+    ]
+    
+    # 表格一屏只显示十几行，不需要对全部卖家排序
+    top_k = 1000
+    st.dataframe(
+        top_k_rows(filtered_data[display_columns], 'total_gmv', top_k),
+        use_container_width=True
+    )
+    if len(filtered_data) > top_k:
+        st.caption(T['top_rows_note'].format(k=top_k))
+    
+    # 数据导出
+    if st.button(T['export_csv']):
+        csv = _export_csv_bytes(data_key, filtered_data[display_columns])
+        st.download_button(
+            label=T['download_csv'],
+            data=csv,
+            file_name=f"olist_filtered_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            mime="text/csv"
+        )
+
+# 月度画像直接读取的原始表（缺任何一张都无法构建画像）
+MONTHLY_REQUIRED_TABLES = ['orders', 'sellers', 'order_items', 'reviews', 'products']
+
+# 月度分析读取的文件：DataPipeline的8张原始表，以及原始表不全时退回使用的卖家画像
+MONTHLY_DATA_FILES = (
+    'olist_sellers_dataset.csv', 'olist_orders_dataset.csv', 'olist_order_items_dataset.csv',
+    'olist_order_reviews_dataset.csv', 'olist_order_payments_dataset.csv', 'olist_products_dataset.csv',
+    'olist_customers_dataset.csv', 'product_category_name_translation.csv', 'seller_profile_processed.csv'
+)
+
+# 月度画像缓存的条目上限：键为(月份, 回望月数)，每条是一整张卖家画像；
+# 足够覆盖一次12个月的轨迹分析，又不会随月份×回望组合无限增长
+MONTHLY_PROFILE_CACHE_ENTRIES = 32
+
+def monthly_data_version(data_path):
+    """月度分析数据文件的最新修改时间（原始CSV更新后月度缓存随之失效）"""
+    return data_version(data_path, MONTHLY_DATA_FILES)
+
+@st.cache_resource(max_entries=DATA_VERSION_CACHE_ENTRIES)
+def _load_monthly_raw_data(data_path, version):
+    """月度分析用的原始数据表（version见monthly_data_version）
+
+    读取并预处理8张CSV是月度分析最重的一步；结果只读，用cache_resource跨会话共享。
+    load_raw_data只记录各表的读取错误，这里检查必需的表都已加载，否则抛出ValueError：
+    异常不会被缓存，文件补齐后下次运行即可重新加载，而不是让残缺结果一直留在共享缓存里。
+    """
+    analyzer = MonthlySellerAnalyzer(DataPipeline(data_path=data_path))
+    raw_data = analyzer.load_raw_data()
+    missing = [
+        name for name in MONTHLY_REQUIRED_TABLES
+        if raw_data.get(name) is None or len(raw_data[name]) == 0
+    ]
+    if missing:
+        raise ValueError(f"月度分析原始数据不完整，缺少: {', '.join(missing)}")
+    if 'year_month' not in raw_data['orders'].columns:
+        raise ValueError("订单表缺少order_purchase_timestamp，无法按月份分析")
+    return raw_data
+
+@st.cache_data(max_entries=DATA_VERSION_CACHE_ENTRIES)
+def _get_available_months(data_path, version):
+    """可用月份列表"""
+    return create_monthly_analyzer(DataPipeline(data_path=data_path)).get_available_months()
+
+@st.cache_data(show_spinner=False, max_entries=MONTHLY_PROFILE_CACHE_ENTRIES)
+def _build_monthly_profile(data_path, version, target_month, lookback_months):
+    """按(数据版本, 月份, 回望月数)缓存的月度卖家画像"""
+    analyzer = create_monthly_analyzer(DataPipeline(data_path=data_path))
+    return analyzer.build_monthly_seller_profile(target_month, lookback_months)
+
+def create_monthly_analyzer(data_pipeline):
+    """创建月度分析器，复用缓存的原始数据
+
+    分析器本身（及其monthly_profiles）每次运行新建，不在会话间共享可变状态。
+    """
+    analyzer = MonthlySellerAnalyzer(data_pipeline)
+    data_path = data_pipeline.data_path
+    analyzer.raw_data = _load_monthly_raw_data(data_path, monthly_data_version(data_path))
+    return analyzer
+
+def build_monthly_profile(analyzer, target_month, lookback_months):
+    """构建月度画像（命中缓存时直接登记到分析器中）"""
+    data_path = analyzer.data_pipeline.data_path
+    profile = _build_monthly_profile(data_path, monthly_data_version(data_path), target_month, lookback_months)
+    if len(profile) > 0:
+        analyzer.monthly_profiles[target_month] = profile
+    return profile
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _analyze_tier_changes(data_path, version, analysis_months, lookback_months):
+    """按(数据版本, 月份序列, 回望月数)缓存的层级流转结果（流转矩阵、稳定性）
+
+    每条结果包含整段时间的多月卖家数据，键又是起止月份×回望月数的组合，只保留最近几次分析。
+    """
+    analyzer = create_monthly_analyzer(DataPipeline(data_path=data_path))
+    for month in analysis_months:
+        build_monthly_profile(analyzer, month, lookback_months)
+    return analyzer.analyze_tier_changes(list(analysis_months))
+
 def show_monthly_analysis(data_pipeline):
     """显示月度分析"""
     
@@ -1396,9 +1780,15 @@ def show_monthly_analysis(data_pipeline):
         st.title("📅 月度卖家层级分析")
         st.markdown("---")
         
-        # 创建分析器
-        analyzer = MonthlySellerAnalyzer(data_pipeline)
-        available_months = analyzer.get_available_months()
+        # 创建分析器（原始数据不完整时按无可用月份处理）
+        try:
+            analyzer = create_monthly_analyzer(data_pipeline)
+            available_months = _get_available_months(
+                data_pipeline.data_path, monthly_data_version(data_pipeline.data_path)
+            )
+        except ValueError as e:
+            logger.error(f"❌ {e}")
+            available_months = []
         
         if not available_months:
             st.error("❌ 没有可用的月度数据")
@@ -1421,160 +1811,22 @@ def show_monthly_analysis(data_pipeline):
             help="选择不同的分析维度"
         )
         
-        if analysis_type == "同比环比分析":
-            # 同比环比分析
-            st.subheader("📈 同比环比分析")
-            
-            # 月份选择
-            selected_month = st.selectbox(
-                "📅 选择目标月份",
-                available_months,
-                index=len(available_months)-1,  # 默认最新月份
-                help="将分析此月份与环比（上月）、同比（去年同月）的对比"
-            )
-            
-            # 回望期设置
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                lookback_months = st.slider("📆 数据回望月数", 1, 12, 3, 
-                                          help="🔍 数据回望逻辑说明：\n\n" +
-                                               "• 向前追溯N个月的历史数据来计算累积指标\n" +
-                                               "• 例如：分析2018-10月，回望3个月 = 使用2018-08~10月数据\n" +
-                                               "• 好处：平滑单月波动，提供更稳定的分层标准\n\n" +
-                                               "推荐设置：\n" +
-                                               "• 1个月：实时监控（波动大）\n" +
-                                               "• 3个月：常规分析（平衡性最佳）⭐\n" +
-                                               "• 6个月：长期趋势（反应滞后）")
-            with col2:
-                st.markdown("")
-                if st.button("📖", help="查看详细的数据回望逻辑说明文档"):
-                    if st.session_state.get('language', 'zh') == 'en':
-                        st.info("📄 Detailed Documentation: docs/Monthly_Analysis_Lookback_Logic_EN.md")
-                    else:
-                        st.info("📄 详细文档：docs/Monthly_Analysis_Lookback_Logic.md")
-            
-            if st.button("🔍 开始同比环比分析", type="primary"):
-                with st.spinner("🔄 正在进行同比环比分析..."):
-                    # 先构建目标月份画像
-                    analyzer.build_monthly_seller_profile(selected_month, lookback_months)
-                    
-                    # 执行同比环比分析
-                    comparison_result = analyzer.analyze_period_comparison(selected_month)
-                    
-                    if comparison_result and ('mom_comparison' in comparison_result or 'yoy_comparison' in comparison_result):
-                        # 显示分析结果
-                        display_comparison_results(comparison_result, selected_month)
-                    else:
-                        st.warning("⚠️ 无法获取对比数据，请检查历史月份数据")
-        
-        elif analysis_type == "多月轨迹分析":
-            # 多月轨迹分析
-            st.subheader("🛤️ 卖家轨迹分析")
-            
-            # 月份范围选择
-            col1, col2 = st.columns(2)
-            with col1:
-                start_month = st.selectbox("📅 起始月份", available_months, 
-                                         index=max(0, len(available_months)-6))
-            with col2:
-                end_month = st.selectbox("📅 结束月份", available_months,
-                                       index=len(available_months)-1)
-            
-            # 参数设置
-            min_months = st.slider("📊 最少数据月数", 2, 6, 3,
-                                 help="卖家至少需要的有效月份数据")
-            
-            # 生成月份列表
-            start_idx = available_months.index(start_month)
-            end_idx = available_months.index(end_month)
-            if start_idx <= end_idx:
-                analysis_months = available_months[start_idx:end_idx+1]
-                st.info(f"📊 将分析 {len(analysis_months)} 个月份: {', '.join(analysis_months)}")
-                
-                if st.button("🔍 开始轨迹分析", type="primary"):
-                    with st.spinner("🔄 正在分析卖家轨迹..."):
-                        trajectory_result = analyzer.analyze_seller_trajectory(analysis_months, min_months)
-                        
-                        if 'error' not in trajectory_result:
-                            display_trajectory_results(trajectory_result)
-                        else:
-                            st.error(f"❌ {trajectory_result['error']}")
-            else:
-                st.error("❌ 起始月份不能晚于结束月份")
-        
-        else:  # 层级流转分析
-            # 原有的层级流转分析
-            st.subheader("🔄 层级流转分析")
-            
-            st.info("💡 **说明**：层级流转矩阵将显示您选择月份范围内**最后两个月**的卖家层级变化对比")
-            
-            # 月份选择
-            col1, col2 = st.columns(2)
-            with col1:
-                start_month = st.selectbox("📅 起始月份", available_months, 
-                                         index=max(0, len(available_months)-6),  # 更早的默认起始点
-                                         help="选择分析的起始月份")
-            with col2:
-                end_month = st.selectbox("📅 结束月份", available_months,
-                                       index=len(available_months)-1,
-                                       help="选择分析的结束月份")
-            
-            # 显示当前选择的对比月份
-            start_idx = available_months.index(start_month)
-            end_idx = available_months.index(end_month)
-            if start_idx <= end_idx:
-                analysis_months = available_months[start_idx:end_idx+1]
-                if len(analysis_months) >= 2:
-                    flow_comparison = f"{analysis_months[-2]} → {analysis_months[-1]}"
-                    st.success(f"🔄 **流转对比月份**：{flow_comparison}")
-                else:
-                    st.warning("⚠️ 请至少选择2个月份进行流转分析")
-            
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                lookback_months = st.slider("📆 数据回望月数", 1, 12, 3,
-                                          help="🔍 数据回望逻辑说明：\n\n" +
-                                               "• 向前追溯N个月的历史数据来计算累积指标\n" +
-                                               "• 例如：分析2018-10月，回望3个月 = 使用2018-08~10月数据\n" +
-                                               "• 好处：平滑单月波动，提供更稳定的分层标准\n\n" +
-                                               "推荐设置：\n" +
-                                               "• 1个月：实时监控（波动大）\n" +
-                                               "• 3个月：常规分析（平衡性最佳）⭐\n" +
-                                               "• 6个月：长期趋势（反应滞后）")
-            with col2:
-                st.markdown("")
-                if st.button("📖 详情", help="查看详细的数据回望逻辑说明文档", key="lookback_help_flow"):
-                    if st.session_state.get('language', 'zh') == 'en':
-                        st.info("📄 Detailed Documentation: docs/Monthly_Analysis_Lookback_Logic_EN.md")
-                    else:
-                        st.info("📄 详细文档：docs/Monthly_Analysis_Lookback_Logic.md")
-            
-            if len(analysis_months) >= 2:
-                if st.button("🔍 开始层级流转分析", type="primary"):
-                    with st.spinner("🔄 正在分析层级流转..."):
-                        # 构建选定月份的画像
-                        for month in analysis_months:
-                            analyzer.build_monthly_seller_profile(month, lookback_months)
-                        
-                        # 分析层级变化
-                        flow_result = analyzer.analyze_tier_changes(analysis_months)
-                        
-                        if isinstance(flow_result, dict) and flow_result:
-                            display_flow_results(flow_result, analysis_months)
-                        else:
-                            st.warning("⚠️ 暂无层级流转数据")
-            else:
-                if start_idx > end_idx:
-                    st.error("❌ 起始月份不能晚于结束月份")
+        render_monthly_analysis(data_pipeline, available_months, analysis_type)
     
     else:
         # English version
         st.title("📅 Monthly Seller Tier Analysis")
         st.markdown("---")
         
-        # 创建分析器
-        analyzer = MonthlySellerAnalyzer(data_pipeline)
-        available_months = analyzer.get_available_months()
+        # Create analyzer (incomplete raw data counts as no available months)
+        try:
+            analyzer = create_monthly_analyzer(data_pipeline)
+            available_months = _get_available_months(
+                data_pipeline.data_path, monthly_data_version(data_pipeline.data_path)
+            )
+        except ValueError as e:
+            logger.error(f"❌ {e}")
+            available_months = []
         
         if not available_months:
             st.error("❌ No monthly data available")
@@ -1597,152 +1849,326 @@ def show_monthly_analysis(data_pipeline):
             help="Choose different analysis dimensions"
         )
         
-        if analysis_type == get_text('period_comparison'):
-            # Period Comparison Analysis
-            st.subheader("📈 " + get_text('period_comparison'))
-            
-            # Month selection
-            selected_month = st.selectbox(
-                get_text('select_target_month'),
-                available_months,
-                index=len(available_months)-1,  # Default to latest month
-                help="Will analyze this month vs MoM (previous month) and YoY (same month last year)"
-            )
-            
-            # Lookback period setting
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                lookback_months = st.slider(get_text('data_lookback_months'), 1, 12, 3, 
-                                          help="🔍 Data lookback logic:\n\n" +
-                                               "• Look back N months of historical data to calculate cumulative metrics\n" +
-                                               "• Example: Analyzing Oct 2018, lookback 3 months = use data from Aug-Oct 2018\n" +
-                                               "• Benefits: Smooth single-month volatility, provide more stable tier standards\n\n" +
-                                               "Recommended settings:\n" +
-                                               "• 1 month: Real-time monitoring (high volatility)\n" +
-                                               "• 3 months: Regular analysis (best balance) ⭐\n" +
-                                               "• 6 months: Long-term trends (delayed response)")
-            with col2:
-                st.markdown("")
-                if st.button("📖", help="View detailed data lookback logic documentation"):
-                    if st.session_state.get('language', 'zh') == 'en':
-                        st.info("📄 Detailed Documentation: docs/Monthly_Analysis_Lookback_Logic_EN.md")
-                    else:
-                        st.info("📄 详细文档：docs/Monthly_Analysis_Lookback_Logic.md")
+        render_monthly_analysis_en(data_pipeline, available_months, analysis_type)
+
+
+@_fragment
+def render_monthly_analysis(data_pipeline, available_months, analysis_type):
+    """月度分析主体（fragment：页内控件交互只重跑本函数）"""
+    # 每次运行（含片段重跑）新建分析器：monthly_profiles不跨点击保留，结果与点击顺序无关
+    analyzer = create_monthly_analyzer(data_pipeline)
+    
+    if analysis_type == "同比环比分析":
+        # 同比环比分析
+        st.subheader("📈 同比环比分析")
+        
+        # 月份选择
+        selected_month = st.selectbox(
+            "📅 选择目标月份",
+            available_months,
+            index=len(available_months)-1,  # 默认最新月份
+            help="将分析此月份与环比（上月）、同比（去年同月）的对比"
+        )
+        
+        # 回望期设置
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            lookback_months = st.slider("📆 数据回望月数", 1, 12, 3, 
+                                      help="🔍 数据回望逻辑说明：\n\n" +
+                                           "• 向前追溯N个月的历史数据来计算累积指标\n" +
+                                           "• 例如：分析2018-10月，回望3个月 = 使用2018-08~10月数据\n" +
+                                           "• 好处：平滑单月波动，提供更稳定的分层标准\n\n" +
+                                           "推荐设置：\n" +
+                                           "• 1个月：实时监控（波动大）\n" +
+                                           "• 3个月：常规分析（平衡性最佳）⭐\n" +
+                                           "• 6个月：长期趋势（反应滞后）")
+        with col2:
+            st.markdown("")
+            if st.button("📖", help="查看详细的数据回望逻辑说明文档"):
+                if st.session_state.get('language', 'zh') == 'en':
+                    st.info("📄 Detailed Documentation: docs/Monthly_Analysis_Lookback_Logic_EN.md")
+                else:
+                    st.info("📄 详细文档：docs/Monthly_Analysis_Lookback_Logic.md")
+        
+        if st.button("🔍 开始同比环比分析", type="primary"):
+            with st.spinner("🔄 正在进行同比环比分析..."):
+                # 先构建目标月份画像
+                build_monthly_profile(analyzer, selected_month, lookback_months)
+                
+                # 执行同比环比分析
+                comparison_result = analyzer.analyze_period_comparison(selected_month)
+                
+                if comparison_result and ('mom_comparison' in comparison_result or 'yoy_comparison' in comparison_result):
+                    # 显示分析结果
+                    display_comparison_results(comparison_result, selected_month)
+                else:
+                    st.warning("⚠️ 无法获取对比数据，请检查历史月份数据")
+    
+    elif analysis_type == "多月轨迹分析":
+        # 多月轨迹分析
+        st.subheader("🛤️ 卖家轨迹分析")
+        
+        # 月份范围选择
+        col1, col2 = st.columns(2)
+        with col1:
+            start_month = st.selectbox("📅 起始月份", available_months, 
+                                     index=max(0, len(available_months)-6))
+        with col2:
+            end_month = st.selectbox("📅 结束月份", available_months,
+                                   index=len(available_months)-1)
+        
+        # 参数设置
+        min_months = st.slider("📊 最少数据月数", 2, 6, 3,
+                             help="卖家至少需要的有效月份数据")
+        
+        # 生成月份列表
+        start_idx = available_months.index(start_month)
+        end_idx = available_months.index(end_month)
+        if start_idx <= end_idx:
+            analysis_months = available_months[start_idx:end_idx+1]
+            st.info(f"📊 将分析 {len(analysis_months)} 个月份: {', '.join(analysis_months)}")
             
-            if st.button(get_text('start_period_comparison'), type="primary"):
-                with st.spinner("🔄 Performing period comparison analysis..."):
-                    # Build target month profile first
-                    analyzer.build_monthly_seller_profile(selected_month, lookback_months)
-                    
-                    # Execute period comparison analysis
-                    comparison_result = analyzer.analyze_period_comparison(selected_month)
+            if st.button("🔍 开始轨迹分析", type="primary"):
+                with st.spinner("🔄 正在分析卖家轨迹..."):
+                    trajectory_result = analyzer.analyze_seller_trajectory(analysis_months, min_months)
                     
-                    if comparison_result and ('mom_comparison' in comparison_result or 'yoy_comparison' in comparison_result):
-                        # Display analysis results
-                        display_comparison_results_en(comparison_result, selected_month)
+                    if 'error' not in trajectory_result:
+                        display_trajectory_results(trajectory_result)
                     else:
-                        st.warning("⚠️ Unable to retrieve comparison data, please check historical month data")
+                        st.error(f"❌ {trajectory_result['error']}")
+        else:
+            st.error("❌ 起始月份不能晚于结束月份")
+    
+    else:  # 层级流转分析
+        # 原有的层级流转分析
+        st.subheader("🔄 层级流转分析")
         
-        elif analysis_type == get_text('trajectory_analysis'):
-            # Trajectory Analysis
-            st.subheader("🛤️ Seller Trajectory Analysis")
-            
-            # Month range selection
-            col1, col2 = st.columns(2)
-            with col1:
-                start_month = st.selectbox(get_text('select_start_month'), available_months, 
-                                         index=max(0, len(available_months)-6))
-            with col2:
-                end_month = st.selectbox(get_text('select_end_month'), available_months,
-                                       index=len(available_months)-1)
-            
-            # Parameter settings
-            min_months = st.slider(get_text('min_data_months'), 2, 6, 3,
-                                 help="Minimum number of valid months of data required for sellers")
-            
-            # Generate month list
-            start_idx = available_months.index(start_month)
-            end_idx = available_months.index(end_month)
-            if start_idx <= end_idx:
-                analysis_months = available_months[start_idx:end_idx+1]
-                st.info(f"📊 Will analyze {len(analysis_months)} months: {', '.join(analysis_months)}")
-                
-                if st.button(get_text('start_trajectory_analysis'), type="primary"):
-                    with st.spinner("🔄 Analyzing seller trajectories..."):
-                        trajectory_result = analyzer.analyze_seller_trajectory(analysis_months, min_months)
-                        
-                        if 'error' not in trajectory_result:
-                            display_trajectory_results_en(trajectory_result)
-                        else:
-                            st.error(f"❌ {trajectory_result['error']}")
+        st.info("💡 **说明**：层级流转矩阵将显示您选择月份范围内**最后两个月**的卖家层级变化对比")
+        
+        # 月份选择
+        col1, col2 = st.columns(2)
+        with col1:
+            start_month = st.selectbox("📅 起始月份", available_months, 
+                                     index=max(0, len(available_months)-6),  # 更早的默认起始点
+                                     help="选择分析的起始月份")
+        with col2:
+            end_month = st.selectbox("📅 结束月份", available_months,
+                                   index=len(available_months)-1,
+                                   help="选择分析的结束月份")
+        
+        # 显示当前选择的对比月份
+        start_idx = available_months.index(start_month)
+        end_idx = available_months.index(end_month)
+        if start_idx <= end_idx:
+            analysis_months = available_months[start_idx:end_idx+1]
+            if len(analysis_months) >= 2:
+                flow_comparison = f"{analysis_months[-2]} → {analysis_months[-1]}"
+                st.success(f"🔄 **流转对比月份**：{flow_comparison}")
             else:
-                st.error(get_text('error_start_after_end'))
+                st.warning("⚠️ 请至少选择2个月份进行流转分析")
         
-        else:  # Tier Flow Analysis
-            # Original tier flow analysis
-            st.subheader(get_text('tier_flow_title'))
-            
-            st.info("💡 **Note**: The tier flow matrix will display seller tier changes comparison between the **last two months** of your selected range")
-            
-            # Month selection
-            col1, col2 = st.columns(2)
-            with col1:
-                start_month = st.selectbox(get_text('start_month'), available_months, 
-                                         index=max(0, len(available_months)-6),  # Earlier default start point
-                                         help="Select the starting month for analysis")
-            with col2:
-                end_month = st.selectbox(get_text('end_month'), available_months,
-                                       index=len(available_months)-1,
-                                       help="Select the ending month for analysis")
-            
-            # Display current comparison months
-            start_idx = available_months.index(start_month)
-            end_idx = available_months.index(end_month)
-            if start_idx <= end_idx:
-                analysis_months = available_months[start_idx:end_idx+1]
-                if len(analysis_months) >= 2:
-                    flow_comparison = f"{analysis_months[-2]} → {analysis_months[-1]}"
-                    st.success(f"🔄 **Flow Comparison Months**: {flow_comparison}")
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            lookback_months = st.slider("📆 数据回望月数", 1, 12, 3,
+                                      help="🔍 数据回望逻辑说明：\n\n" +
+                                           "• 向前追溯N个月的历史数据来计算累积指标\n" +
+                                           "• 例如：分析2018-10月，回望3个月 = 使用2018-08~10月数据\n" +
+                                           "• 好处：平滑单月波动，提供更稳定的分层标准\n\n" +
+                                           "推荐设置：\n" +
+                                           "• 1个月：实时监控（波动大）\n" +
+                                           "• 3个月：常规分析（平衡性最佳）⭐\n" +
+                                           "• 6个月：长期趋势（反应滞后）")
+        with col2:
+            st.markdown("")
+            if st.button("📖 详情", help="查看详细的数据回望逻辑说明文档", key="lookback_help_flow"):
+                if st.session_state.get('language', 'zh') == 'en':
+                    st.info("📄 Detailed Documentation: docs/Monthly_Analysis_Lookback_Logic_EN.md")
                 else:
-                    st.warning("⚠️ Please select at least 2 months for flow analysis")
-            
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                lookback_months = st.slider(get_text('data_lookback_months'), 1, 12, 3,
-                                          help="🔍 Data lookback logic:\n\n" +
-                                               "• Look back N months of historical data to calculate cumulative metrics\n" +
-                                               "• Example: Analyzing Oct 2018, lookback 3 months = use data from Aug-Oct 2018\n" +
-                                               "• Benefits: Smooth single-month volatility, provide more stable tier standards\n\n" +
-                                               "Recommended settings:\n" +
-                                               "• 1 month: Real-time monitoring (high volatility)\n" +
-                                               "• 3 months: Regular analysis (best balance) ⭐\n" +
-                                               "• 6 months: Long-term trends (delayed response)")
-            with col2:
-                st.markdown("")
-                if st.button("📖 Details", help="View detailed data lookback logic documentation", key="lookback_help_flow_en"):
-                    if st.session_state.get('language', 'zh') == 'en':
-                        st.info("📄 Detailed Documentation: docs/Monthly_Analysis_Lookback_Logic_EN.md")
+                    st.info("📄 详细文档：docs/Monthly_Analysis_Lookback_Logic.md")
+        
+        if len(analysis_months) >= 2:
+            if st.button("🔍 开始层级流转分析", type="primary"):
+                with st.spinner("🔄 正在分析层级流转..."):
+                    # 构建选定月份的画像并分析层级变化（按月份序列和回望月数缓存）
+                    flow_result = _analyze_tier_changes(
+                        analyzer.data_pipeline.data_path, monthly_data_version(analyzer.data_pipeline.data_path),
+                        tuple(analysis_months), lookback_months
+                    )
+                    
+                    if isinstance(flow_result, dict) and flow_result:
+                        display_flow_results(flow_result, analysis_months)
                     else:
-                        st.info("📄 详细文档：docs/Monthly_Analysis_Lookback_Logic.md")
+                        st.warning("⚠️ 暂无层级流转数据")
+        else:
+            if start_idx > end_idx:
+                st.error("❌ 起始月份不能晚于结束月份")
+
+
+@_fragment
+def render_monthly_analysis_en(data_pipeline, available_months, analysis_type):
+    """Monthly analysis body (English version, runs as a fragment)"""
+    # New analyzer on every run (including fragment reruns): monthly_profiles never carry over between clicks
+    analyzer = create_monthly_analyzer(data_pipeline)
+    
+    if analysis_type == get_text('period_comparison'):
+        # Period Comparison Analysis
+        st.subheader("📈 " + get_text('period_comparison'))
+        
+        # Month selection
+        selected_month = st.selectbox(
+            get_text('select_target_month'),
+            available_months,
+            index=len(available_months)-1,  # Default to latest month
+            help="Will analyze this month vs MoM (previous month) and YoY (same month last year)"
+        )
+        
+        # Lookback period setting
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            lookback_months = st.slider(get_text('data_lookback_months'), 1, 12, 3, 
+                                      help="🔍 Data lookback logic:\n\n" +
+                                           "• Look back N months of historical data to calculate cumulative metrics\n" +
+                                           "• Example: Analyzing Oct 2018, lookback 3 months = use data from Aug-Oct 2018\n" +
+                                           "• Benefits: Smooth single-month volatility, provide more stable tier standards\n\n" +
+                                           "Recommended settings:\n" +
+                                           "• 1 month: Real-time monitoring (high volatility)\n" +
+                                           "• 3 months: Regular analysis (best balance) ⭐\n" +
+                                           "• 6 months: Long-term trends (delayed response)")
+        with col2:
+            st.markdown("")
+            if st.button("📖", help="View detailed data lookback logic documentation"):
+                if st.session_state.get('language', 'zh') == 'en':
+                    st.info("📄 Detailed Documentation: docs/Monthly_Analysis_Lookback_Logic_EN.md")
+                else:
+                    st.info("📄 详细文档：docs/Monthly_Analysis_Lookback_Logic.md")
+        
+        if st.button(get_text('start_period_comparison'), type="primary"):
+            with st.spinner("🔄 Performing period comparison analysis..."):
+                # Build target month profile first
+                build_monthly_profile(analyzer, selected_month, lookback_months)
+                
+                # Execute period comparison analysis
+                comparison_result = analyzer.analyze_period_comparison(selected_month)
+                
+                if comparison_result and ('mom_comparison' in comparison_result or 'yoy_comparison' in comparison_result):
+                    # Display analysis results
+                    display_comparison_results_en(comparison_result, selected_month)
+                else:
+                    st.warning("⚠️ Unable to retrieve comparison data, please check historical month data")
+    
+    elif analysis_type == get_text('trajectory_analysis'):
+        # Trajectory Analysis
+        st.subheader("🛤️ Seller Trajectory Analysis")
+        
+        # Month range selection
+        col1, col2 = st.columns(2)
+        with col1:
+            start_month = st.selectbox(get_text('select_start_month'), available_months, 
+                                     index=max(0, len(available_months)-6))
+        with col2:
+            end_month = st.selectbox(get_text('select_end_month'), available_months,
+                                   index=len(available_months)-1)
+        
+        # Parameter settings
+        min_months = st.slider(get_text('min_data_months'), 2, 6, 3,
+                             help="Minimum number of valid months of data required for sellers")
+        
+        # Generate month list
+        start_idx = available_months.index(start_month)
+        end_idx = available_months.index(end_month)
+        if start_idx <= end_idx:
+            analysis_months = available_months[start_idx:end_idx+1]
+            st.info(f"📊 Will analyze {len(analysis_months)} months: {', '.join(analysis_months)}")
             
+            if st.button(get_text('start_trajectory_analysis'), type="primary"):
+                with st.spinner("🔄 Analyzing seller trajectories..."):
+                    trajectory_result = analyzer.analyze_seller_trajectory(analysis_months, min_months)
+                    
+                    if 'error' not in trajectory_result:
+                        display_trajectory_results_en(trajectory_result)
+                    else:
+                        st.error(f"❌ {trajectory_result['error']}")
+        else:
+            st.error(get_text('error_start_after_end'))
+    
+    else:  # Tier Flow Analysis
+        # Original tier flow analysis
+        st.subheader(get_text('tier_flow_title'))
+        
+        st.info("💡 **Note**: The tier flow matrix will display seller tier changes comparison between the **last two months** of your selected range")
+        
+        # Month selection
+        col1, col2 = st.columns(2)
+        with col1:
+            start_month = st.selectbox(get_text('start_month'), available_months, 
+                                     index=max(0, len(available_months)-6),  # Earlier default start point
+                                     help="Select the starting month for analysis")
+        with col2:
+            end_month = st.selectbox(get_text('end_month'), available_months,
+                                   index=len(available_months)-1,
+                                   help="Select the ending month for analysis")
+        
+        # Display current comparison months
+        start_idx = available_months.index(start_month)
+        end_idx = available_months.index(end_month)
+        if start_idx <= end_idx:
+            analysis_months = available_months[start_idx:end_idx+1]
             if len(analysis_months) >= 2:
-                if st.button(get_text('start_tier_flow_analysis'), type="primary"):
-                    with st.spinner("🔄 Analyzing tier flows..."):
-                        # Build profiles for selected months
-                        for month in analysis_months:
-                            analyzer.build_monthly_seller_profile(month, lookback_months)
-                        
-                        # Analyze tier changes
-                        flow_result = analyzer.analyze_tier_changes(analysis_months)
-                        
-                        if isinstance(flow_result, dict) and flow_result:
-                            display_flow_results_en(flow_result, analysis_months)
-                        else:
-                            st.warning(get_text('no_tier_flow_data'))
+                flow_comparison = f"{analysis_months[-2]} → {analysis_months[-1]}"
+                st.success(f"🔄 **Flow Comparison Months**: {flow_comparison}")
             else:
-                if start_idx > end_idx:
-                    st.error(get_text('error_start_after_end'))
+                st.warning("⚠️ Please select at least 2 months for flow analysis")
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            lookback_months = st.slider(get_text('data_lookback_months'), 1, 12, 3,
+                                      help="🔍 Data lookback logic:\n\n" +
+                                           "• Look back N months of historical data to calculate cumulative metrics\n" +
+                                           "• Example: Analyzing Oct 2018, lookback 3 months = use data from Aug-Oct 2018\n" +
+                                           "• Benefits: Smooth single-month volatility, provide more stable tier standards\n\n" +
+                                           "Recommended settings:\n" +
+                                           "• 1 month: Real-time monitoring (high volatility)\n" +
+                                           "• 3 months: Regular analysis (best balance) ⭐\n" +
+                                           "• 6 months: Long-term trends (delayed response)")
+        with col2:
+            st.markdown("")
+            if st.button("📖 Details", help="View detailed data lookback logic documentation", key="lookback_help_flow_en"):
+                if st.session_state.get('language', 'zh') == 'en':
+                    st.info("📄 Detailed Documentation: docs/Monthly_Analysis_Lookback_Logic_EN.md")
+                else:
+                    st.info("📄 详细文档：docs/Monthly_Analysis_Lookback_Logic.md")
+        
+        if len(analysis_months) >= 2:
+            if st.button(get_text('start_tier_flow_analysis'), type="primary"):
+                with st.spinner("🔄 Analyzing tier flows..."):
+                    # Build profiles and analyze tier changes (cached per month range and lookback)
+                    flow_result = _analyze_tier_changes(
+                        analyzer.data_pipeline.data_path, monthly_data_version(analyzer.data_pipeline.data_path),
+                        tuple(analysis_months), lookback_months
+                    )
+                    
+                    if isinstance(flow_result, dict) and flow_result:
+                        display_flow_results_en(flow_result, analysis_months)
+                    else:
+                        st.warning(get_text('no_tier_flow_data'))
+        else:
+            if start_idx > end_idx:
+                st.error(get_text('error_start_after_end'))
+
 
+# 升降级明细表的展示列（分析器输出的固定列名）和各语言列名
+COMPARISON_DETAIL_COLUMNS = ['seller_id', 'previous_tier', 'current_tier', 'tier_change']
+COMPARISON_DETAIL_LABELS = {
+    lang: {
+        kind: {
+            'previous_tier': TEXTS[lang]['original_tier'],
+            'current_tier': TEXTS[lang]['new_tier'],
+            'tier_change': TEXTS[lang][magnitude]
+        }
+        for kind, magnitude in [('upgraded', 'upgrade_magnitude'), ('downgraded', 'downgrade_magnitude')]
+    }
+    for lang in TEXTS
+}
 
 def display_comparison_results(comparison_result, target_month):
     """显示同比环比分析结果"""
@@ -1778,14 +2204,9 @@ def display_comparison_results(comparison_result, target_month):
         with col1:
             if len(mom_data['upgraded_sellers']) > 0:
                 st.markdown("##### 📈 升级卖家明细 (前10名)")
-                upgraded_display = mom_data['upgraded_sellers'].head(10)[
-                    ['seller_id', f'business_tier_{mom_data["month2"]}', 
-                     f'business_tier_{mom_data["month1"]}', 'tier_change']
-                ].rename(columns={
-                    f'business_tier_{mom_data["month2"]}': '原层级',
-                    f'business_tier_{mom_data["month1"]}': '新层级',
-                    'tier_change': '升级幅度'
-                })
+                upgraded_display = top_k_rows(mom_data['upgraded_sellers'], 'tier_change', 10)[
+                    COMPARISON_DETAIL_COLUMNS
+                ].rename(columns=COMPARISON_DETAIL_LABELS['zh']['upgraded'])
                 st.dataframe(upgraded_display, use_container_width=True)
             else:
                 st.info("📈 本月无升级卖家")
@@ -1793,14 +2214,9 @@ def display_comparison_results(comparison_result, target_month):
         with col2:
             if len(mom_data['downgraded_sellers']) > 0:
                 st.markdown("##### 📉 降级卖家明细 (前10名)")
-                downgraded_display = mom_data['downgraded_sellers'].head(10)[
-                    ['seller_id', f'business_tier_{mom_data["month2"]}', 
-                     f'business_tier_{mom_data["month1"]}', 'tier_change']
-                ].rename(columns={
-                    f'business_tier_{mom_data["month2"]}': '原层级',
-                    f'business_tier_{mom_data["month1"]}': '新层级', 
-                    'tier_change': '降级幅度'
-                })
+                downgraded_display = top_k_rows(mom_data['downgraded_sellers'], 'tier_change', 10, ascending=True)[
+                    COMPARISON_DETAIL_COLUMNS
+                ].rename(columns=COMPARISON_DETAIL_LABELS['zh']['downgraded'])
                 st.dataframe(downgraded_display, use_container_width=True)
             else:
                 st.info("📉 本月无降级卖家")
@@ -1865,14 +2281,9 @@ def display_comparison_results_en(comparison_result, target_month):
         with col1:
             if len(mom_data['upgraded_sellers']) > 0:
                 st.markdown("##### " + get_text('upgrade_details'))
-                upgraded_display = mom_data['upgraded_sellers'].head(10)[
-                    ['seller_id', f'business_tier_{mom_data["month2"]}', 
-                     f'business_tier_{mom_data["month1"]}', 'tier_change']
-                ].rename(columns={
-                    f'business_tier_{mom_data["month2"]}': get_text('original_tier'),
-                    f'business_tier_{mom_data["month1"]}': get_text('new_tier'),
-                    'tier_change': get_text('upgrade_magnitude')
-                })
+                upgraded_display = top_k_rows(mom_data['upgraded_sellers'], 'tier_change', 10)[
+                    COMPARISON_DETAIL_COLUMNS
+                ].rename(columns=COMPARISON_DETAIL_LABELS['en']['upgraded'])
                 st.dataframe(upgraded_display, use_container_width=True)
             else:
                 st.info(get_text('no_upgrades'))
@@ -1880,14 +2291,9 @@ def display_comparison_results_en(comparison_result, target_month):
         with col2:
             if len(mom_data['downgraded_sellers']) > 0:
                 st.markdown("##### " + get_text('downgrade_details'))
-                downgraded_display = mom_data['downgraded_sellers'].head(10)[
-                    ['seller_id', f'business_tier_{mom_data["month2"]}', 
-                     f'business_tier_{mom_data["month1"]}', 'tier_change']
-                ].rename(columns={
-                    f'business_tier_{mom_data["month2"]}': get_text('original_tier'),
-                    f'business_tier_{mom_data["month1"]}': get_text('new_tier'), 
-                    'tier_change': get_text('downgrade_magnitude')
-                })
+                downgraded_display = top_k_rows(mom_data['downgraded_sellers'], 'tier_change', 10, ascending=True)[
+                    COMPARISON_DETAIL_COLUMNS
+                ].rename(columns=COMPARISON_DETAIL_LABELS['en']['downgraded'])
                 st.dataframe(downgraded_display, use_container_width=True)
             else:
                 st.info(get_text('no_downgrades'))
@@ -1918,6 +2324,18 @@ def display_comparison_results_en(comparison_result, target_month):
         st.dataframe(yoy_data['flow_matrix'], use_container_width=True)
 
 
+@st.cache_resource(show_spinner=False)
+def trajectory_summary_figures(summary_items, pie_title, bar_title):
+    """轨迹类型分布的饼图和柱状图
+
+    两张图共用同一个小表；按((类型, 数量), ...)缓存，切换分析类型或页内控件时直接复用。
+    列名沿用px对列表参数的默认命名（label/value、x/y），图表内容与传列表时一致。
+    """
+    summary_df = pd.DataFrame(list(summary_items), columns=['label', 'value'])
+    fig_pie = px.pie(summary_df, values='value', names='label', title=pie_title)
+    fig_bar = px.bar(summary_df, x='label', y='value', labels={'label': 'x', 'value': 'y'}, title=bar_title)
+    return fig_pie, fig_bar
+
 def display_trajectory_results(trajectory_result):
     """显示轨迹分析结果"""
     st.markdown("### 🛤️ 轨迹分析结果")
@@ -1940,22 +2358,14 @@ def display_trajectory_results(trajectory_result):
     
     col1, col2 = st.columns(2)
     
+    fig_pie, fig_bar = trajectory_summary_figures(tuple(summary.items()), "轨迹类型分布", "轨迹类型数量")
+    
     with col1:
         # 饼图
-        fig_pie = px.pie(
-            values=list(summary.values()),
-            names=list(summary.keys()),
-            title="轨迹类型分布"
-        )
         st.plotly_chart(fig_pie, use_container_width=True)
     
     with col2:
         # 柱状图
-        fig_bar = px.bar(
-            x=list(summary.keys()),
-            y=list(summary.values()),
-            title="轨迹类型数量"
-        )
         st.plotly_chart(fig_bar, use_container_width=True)
     
     # 详细轨迹数据
@@ -1974,8 +2384,8 @@ def display_trajectory_results(trajectory_result):
             ["波动率", "趋势值", "变化次数"]
         )
     
-    # 数据筛选和排序
-    display_df = trajectory_result['trajectory_data'].copy()
+    # 数据筛选和排序（布尔索引和sort_values都返回新对象，不需要先复制整张表）
+    display_df = trajectory_result['trajectory_data']
     
     if selected_type != "全部":
         display_df = display_df[display_df['trajectory_type'] == selected_type]
@@ -2025,22 +2435,14 @@ def display_trajectory_results_en(trajectory_result):
     
     col1, col2 = st.columns(2)
     
+    fig_pie, fig_bar = trajectory_summary_figures(tuple(summary.items()), "Trajectory Type Distribution", "Trajectory Type Count")
+    
     with col1:
         # Pie chart
-        fig_pie = px.pie(
-            values=list(summary.values()),
-            names=list(summary.keys()),
-            title="Trajectory Type Distribution"
-        )
         st.plotly_chart(fig_pie, use_container_width=True)
     
     with col2:
         # Bar chart
-        fig_bar = px.bar(
-            x=list(summary.keys()),
-            y=list(summary.values()),
-            title="Trajectory Type Count"
-        )
         st.plotly_chart(fig_bar, use_container_width=True)
     
     # Detailed trajectory data
@@ -2064,8 +2466,8 @@ def display_trajectory_results_en(trajectory_result):
             list(sort_options.keys())
         )
     
-    # Data filtering and sorting
-    display_df = trajectory_result['trajectory_data'].copy()
+    # Data filtering and sorting (masking and sort_values return new frames, no copy needed)
+    display_df = trajectory_result['trajectory_data']
     
     if selected_type != get_text('all'):
         display_df = display_df[display_df['trajectory_type'] == selected_type]
@@ -2087,6 +2489,28 @@ def display_trajectory_results_en(trajectory_result):
     )
 
 
+def tier_stability_percent(tier_stability):
+    """层级稳定性字典 -> (层级列表, 稳定率百分比数组)，按列构造，兼容旧格式（值直接是比率）"""
+    tiers = list(tier_stability)
+    rates = np.fromiter(
+        (metrics['stability_rate'] if isinstance(metrics, dict) and 'stability_rate' in metrics else float(metrics)
+         for metrics in tier_stability.values()),
+        dtype=np.float64, count=len(tiers)
+    )
+    return tiers, np.round(rates * 100, 1)
+
+def monthly_kpi_summary(monthly_data, columns):
+    """按月汇总活跃卖家数、总GMV、总订单数（中英文界面共用，columns为显示列名）"""
+    monthly_summary = monthly_data.groupby('month').agg(
+        sellers=('seller_id', 'count'),
+        gmv=('total_gmv', 'sum'),
+        orders=('unique_orders', 'sum')
+    ).round(2)
+    # 卖家数、订单数是整数计数（订单数在月度画像里为浮点列），用int32显示和传输；GMV保留float64以免金额变化
+    monthly_summary = monthly_summary.astype({'sellers': 'int32', 'orders': 'int32'})
+    monthly_summary.columns = columns
+    return monthly_summary
+
 def display_flow_results(flow_result, analysis_months):
     """显示层级流转分析结果 - 保持原有功能"""
     st.markdown("### 🔄 层级流转分析结果")
@@ -2098,12 +2522,7 @@ def display_flow_results(flow_result, analysis_months):
         st.markdown("#### 📊 月度关键指标")
         
         # 按月汇总
-        monthly_summary = monthly_data.groupby('month').agg({
-            'seller_id': 'count',
-            'total_gmv': 'sum',
-            'unique_orders': 'sum'
-        }).round(2)
-        monthly_summary.columns = ['活跃卖家数', '总GMV', '总订单数']
+        monthly_summary = monthly_kpi_summary(monthly_data, ['活跃卖家数', '总GMV', '总订单数'])
         
         st.dataframe(monthly_summary, use_container_width=True)
         
@@ -2116,17 +2535,8 @@ def display_flow_results(flow_result, analysis_months):
         # 显示层级稳定性
         if 'tier_stability' in flow_result:
             st.markdown("#### 📈 层级稳定性")
-            # 正确处理嵌套的稳定性数据结构
-            stability_data = []
-            for tier, metrics in flow_result['tier_stability'].items():
-                if isinstance(metrics, dict) and 'stability_rate' in metrics:
-                    stability_rate = metrics['stability_rate'] * 100  # 转换为百分比
-                    stability_data.append([tier, round(stability_rate, 1)])
-                else:
-                    # 兼容旧格式（如果metrics直接是数值）
-                    stability_data.append([tier, round(float(metrics) * 100, 1)])
-            
-            stability_df = pd.DataFrame(stability_data, columns=['层级', '稳定性(%)'])
+            tiers, stability_rates = tier_stability_percent(flow_result['tier_stability'])
+            stability_df = pd.DataFrame({'层级': tiers, '稳定性(%)': stability_rates})
             
             fig = px.bar(stability_df, x='层级', y='稳定性(%)', 
                         title='各层级稳定性对比')
@@ -2144,12 +2554,7 @@ def display_flow_results_en(flow_result, analysis_months):
         st.markdown("#### 📊 Monthly Key Indicators")
         
         # Monthly summary
-        monthly_summary = monthly_data.groupby('month').agg({
-            'seller_id': 'count',
-            'total_gmv': 'sum',
-            'unique_orders': 'sum'
-        }).round(2)
-        monthly_summary.columns = ['Active Sellers', 'Total GMV', 'Total Orders']
+        monthly_summary = monthly_kpi_summary(monthly_data, ['Active Sellers', 'Total GMV', 'Total Orders'])
         
         st.dataframe(monthly_summary, use_container_width=True)
         
@@ -2162,26 +2567,120 @@ def display_flow_results_en(flow_result, analysis_months):
         # Display tier stability
         if 'tier_stability' in flow_result:
             st.markdown("#### 📈 Tier Stability")
-            # Correctly handle nested stability data structure
-            stability_data = []
-            for tier, metrics in flow_result['tier_stability'].items():
-                if isinstance(metrics, dict) and 'stability_rate' in metrics:
-                    stability_rate = metrics['stability_rate'] * 100  # Convert to percentage
-                    stability_data.append([tier, round(stability_rate, 1)])
-                else:
-                    # Backward compatibility (if metrics is directly a numeric value)
-                    stability_data.append([tier, round(float(metrics) * 100, 1)])
-            
-            stability_df = pd.DataFrame(stability_data, columns=['Tier', 'Stability(%)'])
+            tiers, stability_rates = tier_stability_percent(flow_result['tier_stability'])
+            stability_df = pd.DataFrame({'Tier': tiers, 'Stability(%)': stability_rates})
             
             fig = px.bar(stability_df, x='Tier', y='Stability(%)', 
                         title='Tier Stability Comparison')
             st.plotly_chart(fig, use_container_width=True)
 
+def _categorical_agg(data, key, spec):
+    """按分类列聚合count/sum/mean，结果与groupby(key, observed=True).agg(spec)一致
+
+    分类编码直接作为bincount的分组下标：每个指标一次线性扫描，不走groupby的分组/拆分开销。
+    """
+    codes = data[key].cat.codes.to_numpy()
+    categories = data[key].cat.categories
+    n_groups = len(categories)
+    has_key = codes >= 0
+    
+    # 键无缺失时各列共用同一份分组编码和组计数，只有可能含缺失值的列才单独过滤
+    all_keys = bool(has_key.all())
+    key_counts = np.bincount(codes[has_key], minlength=n_groups)
+    
+    columns = {}
+    for col, funcs in spec.items():
+        values = data[col].to_numpy()
+        if all_keys and values.dtype.kind in 'iub':
+            valid = None
+            group_codes = codes
+            counts = key_counts
+        else:
+            valid = has_key & data[col].notna().to_numpy()
+            group_codes = codes[valid]
+            counts = np.bincount(group_codes, minlength=n_groups)
+        if 'count' in funcs:
+            columns[(col, 'count')] = counts
+        if 'sum' in funcs or 'mean' in funcs:
+            weights = values if valid is None else values[valid]
+            sums = np.bincount(group_codes, weights=weights, minlength=n_groups).astype(np.float64, copy=False)
+            if 'sum' in funcs:
+                columns[(col, 'sum')] = sums.astype(values.dtype) if np.issubdtype(values.dtype, np.integer) else sums
+            if 'mean' in funcs:
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    columns[(col, 'mean')] = sums / counts
+    
+    # observed=True：只保留出现过的类别
+    observed = key_counts > 0
+    index = pd.CategoricalIndex(categories[observed], dtype=data[key].dtype, name=key)
+    return pd.DataFrame(
+        {name: column[observed] for name, column in columns.items()},
+        index=index
+    )
+
+# 层级/州级聚合包含的指标：层级分布图、雷达图、地理图和两张统计表所需指标的并集
+TIER_AGG_SPEC = {
+    'seller_id': ['count'],
+    'total_gmv': ['sum', 'mean'],
+    'unique_orders': ['sum', 'mean'],
+    'avg_review_score': ['mean'],
+    'category_count': ['mean'],
+    'avg_shipping_days': ['mean'],
+    'delivery_success_rate': ['mean'],
+}
+STATE_AGG_SPEC = {
+    'seller_id': ['count'],
+    'total_gmv': ['sum', 'mean'],
+    'avg_review_score': ['mean'],
+    'category_count': ['mean'],
+}
+
+# 两张统计表取用的聚合列（列名由调用方按语言设置）
+TIER_SUMMARY_COLUMNS = [
+    ('seller_id', 'count'), ('total_gmv', 'sum'), ('total_gmv', 'mean'),
+    ('unique_orders', 'sum'), ('unique_orders', 'mean'),
+    ('avg_review_score', 'mean'), ('category_count', 'mean')
+]
+STATE_SUMMARY_COLUMNS = [
+    ('seller_id', 'count'), ('total_gmv', 'sum'), ('total_gmv', 'mean'), ('avg_review_score', 'mean')
+]
+# 两张统计表各语言的显示列名（与上面的列一一对应）
+TIER_SUMMARY_LABELS = {
+    'zh': ['数量', 'GMV总和', 'GMV均值', '订单总数', '订单均值', '平均评分', '平均品类数'],
+    'en': ['Count', 'GMV Sum', 'GMV Mean', 'Orders Sum', 'Orders Mean', 'Avg Rating', 'Avg Categories'],
+}
+STATE_SUMMARY_LABELS = {
+    'zh': ['卖家数量', 'GMV总和', 'GMV均值', '平均评分'],
+    'en': ['Seller Count', 'GMV Sum', 'GMV Mean', 'Avg Rating'],
+}
+
+def _available_spec(data, spec):
+    """去掉数据中不存在的列（如示例数据）"""
+    return {col: funcs for col, funcs in spec.items() if col in data.columns}
+
+def compute_tier_stats(data):
+    """按层级聚合TIER_AGG_SPEC中的指标"""
+    return _categorical_agg(data, 'business_tier', _available_spec(data, TIER_AGG_SPEC))
+
+def compute_state_stats(data):
+    """按州聚合STATE_AGG_SPEC中的指标，按GMV总和从高到低排列（地理图和州级明细表都按此顺序展示）"""
+    state_stats = _categorical_agg(data, 'seller_state', _available_spec(data, STATE_AGG_SPEC))
+    return state_stats.sort_values(('total_gmv', 'sum'), ascending=False, kind='stable')
+
+@st.cache_data(show_spinner=False, max_entries=FILTER_CACHE_ENTRIES)
+def _filter_aggregates(data_key, _data):
+    """按筛选结果指纹缓存的层级/州级聚合和相关矩阵
+
+    每次筛选变化只扫描一遍数据，层级分布图、雷达图、地理图、热力图和两张统计表共用同一份结果。
+    """
+    return {
+        'tier': compute_tier_stats(_data),
+        'state': compute_state_stats(_data),
+        'corr': compute_correlation(_data)
+    }
+
 def detect_data_path():
     """智能检测数据路径，适配不同的运行环境"""
-    import os
-    
     # 可能的数据路径列表（按优先级排序）
     possible_paths = [
         'data/',           # Streamlit Cloud环境（工作目录在项目根目录）
@@ -2219,164 +2718,147 @@ def main():
     if show_welcome_modal():
         return  # 如果弹窗显示，则不加载dashboard内容
     
+    # 本次重跑的文本表（语言已由上面的选择器确定）
+    T = current_texts()
+    
     # 智能检测数据路径
     data_path = detect_data_path()
     
-    # 创建数据管道实例 (用于月度分析)
-    data_pipeline = DataPipeline(data_path=data_path)
+    version = data_version(data_path)
     
     # 加载数据
-    with st.spinner(get_text('loading')):
-        seller_profile, seller_analysis, orders, order_items, reviews, products = load_data()
+    with st.spinner(T['loading']):
+        seller_profile, seller_analysis = load_data()
     
     if seller_analysis is None:
-        st.error(get_text('data_load_error'))
+        st.error(T['data_load_error'])
         return
     
     # 侧边栏筛选器
     filters = create_sidebar_filters(seller_analysis)
     
-    # 应用筛选器
-    filtered_data = apply_filters(seller_analysis, filters)
+    # 应用筛选器（筛选条件未变时复用本会话上次的结果，切换视图等重跑不再重新筛选）
+    filter_key = (data_path, version, repr(sorted(filters.items())))
+    if st.session_state.get('filter_key') == filter_key:
+        filtered_data = st.session_state['filtered_data']
+    else:
+        filtered_data = apply_filters(seller_analysis, filters)
+        st.session_state['filter_key'] = filter_key
+        st.session_state['filtered_data'] = filtered_data
     
     if len(filtered_data) == 0:
-        st.warning(get_text('no_data_warning'))
+        st.warning(T['no_data_warning'])
         return
     
     # 显示筛选结果
-    st.info(f"{get_text('current_display')} {len(filtered_data):,} {get_text('sellers')} ({get_text('of_total')} {len(filtered_data)/len(seller_analysis)*100:.1f}{get_text('percent')})")
+    st.info(f"{T['current_display']} {len(filtered_data):,} {T['sellers']} ({T['of_total']} {len(filtered_data)/len(seller_analysis)*100:.1f}{T['percent']})")
+    
+    # 图表缓存键
+    data_key = data_fingerprint(data_path, version, filtered_data)
+    
+    # KPI卡片和洞察只用少数几列，筛选后统一取成NumPy数组
+    metric_cols = to_column_arrays(filtered_data)
     
     # KPI指标卡片
-    display_kpi_metrics(filtered_data)
+    display_kpi_metrics(metric_cols)
     
-    # 创建标签页
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-        get_text('tab_overview'), get_text('tab_tier'), get_text('tab_geo'), 
-        get_text('tab_performance'), get_text('tab_insights'), get_text('tab_monthly')
-    ])
+    # 视图切换 (st.tabs会执行全部标签页的代码，这里只渲染当前选中的视图)
+    view_labels = {
+        view: T[f'tab_{view}']
+        for view in ['overview', 'tier', 'geo', 'performance', 'insights', 'monthly']
+    }
+    active_tab = st.radio(
+        'view',
+        list(view_labels),
+        format_func=view_labels.get,
+        horizontal=True,
+        key='active_tab',
+        label_visibility='collapsed'
+    )
     
-    with tab1:
-        st.markdown(f"## {get_text('platform_overview')}")
+    if active_tab == 'overview':
+        st.markdown(f"## {T['platform_overview']}")
         
         col1, col2 = st.columns(2)
         
         with col1:
             # 层级分布
-            tier_fig = create_tier_distribution_chart(filtered_data)
+            tier_fig = cached_chart('tier_distribution', data_key, filtered_data,
+                                    tier_stats=_filter_aggregates(data_key, filtered_data)['tier'])
             st.plotly_chart(tier_fig, use_container_width=True)
         
         with col2:
             # GMV vs 订单数散点图
-            scatter_fig = create_gmv_vs_orders_scatter(filtered_data)
+            scatter_fig = cached_chart('gmv_vs_orders', data_key, filtered_data)
             st.plotly_chart(scatter_fig, use_container_width=True)
     
-    with tab2:
-        st.markdown(f"## {get_text('tier_analysis')}")
+    elif active_tab == 'tier':
+        st.markdown(f"## {T['tier_analysis']}")
         
         # 层级统计表
-        tier_summary = filtered_data.groupby('business_tier').agg({
-            'seller_id': 'count',
-            'total_gmv': ['sum', 'mean'],
-            'unique_orders': ['sum', 'mean'],
-            'avg_review_score': 'mean',
-            'category_count': 'mean'
-        }).round(2)
-        
-        # 根据语言设置列名
-        if st.session_state.language == 'en':
-            tier_summary.columns = ['Count', 'GMV Sum', 'GMV Mean', 'Orders Sum', 'Orders Mean', 'Avg Rating', 'Avg Categories']
-        else:
-            tier_summary.columns = ['数量', 'GMV总和', 'GMV均值', '订单总数', '订单均值', '平均评分', '平均品类数']
+        aggregates = _filter_aggregates(data_key, filtered_data)
+        tier_summary = aggregates['tier'][TIER_SUMMARY_COLUMNS].round(2)
+        tier_summary.columns = TIER_SUMMARY_LABELS[st.session_state.language]
         
-        st.markdown(f"### {get_text('tier_stats')}")
+        st.markdown(f"### {T['tier_stats']}")
         st.dataframe(tier_summary, use_container_width=True)
         
         # 性能雷达图
-        radar_fig = create_performance_radar(filtered_data, seller_analysis)
+        radar_fig = cached_chart('performance_radar', data_key, filtered_data,
+                                 all_data=seller_analysis,
+                                 global_stats=_radar_global_bounds(data_path, version),
+                                 tier_stats=aggregates['tier'])
         st.plotly_chart(radar_fig, use_container_width=True)
     
-    with tab3:
-        st.markdown(f"## {get_text('geo_analysis')}")
+    elif active_tab == 'geo':
+        st.markdown(f"## {T['geo_analysis']}")
         
-        geo_fig = create_geographic_analysis(filtered_data)
+        aggregates = _filter_aggregates(data_key, filtered_data)
+        geo_fig = cached_chart('geographic', data_key, filtered_data, state_stats=aggregates['state'])
         st.plotly_chart(geo_fig, use_container_width=True)
         
         # 州级详细数据
-        state_detail = filtered_data.groupby('seller_state').agg({
-            'seller_id': 'count',
-            'total_gmv': ['sum', 'mean'],
-            'avg_review_score': 'mean'
-        }).round(2)
-        
-        # 根据语言设置列名
-        if st.session_state.language == 'en':
-            state_detail.columns = ['Seller Count', 'GMV Sum', 'GMV Mean', 'Avg Rating']
-            sort_col = 'GMV Sum'
-        else:
-            state_detail.columns = ['卖家数量', 'GMV总和', 'GMV均值', '平均评分']
-            sort_col = 'GMV总和'
-            
-        state_detail = state_detail.sort_values(sort_col, ascending=False)
+        state_detail = aggregates['state'][STATE_SUMMARY_COLUMNS].round(2)
+        state_detail.columns = STATE_SUMMARY_LABELS[st.session_state.language]
         
-        st.markdown(f"### {get_text('state_details')}")
+        st.markdown(f"### {T['state_details']}")
         st.dataframe(state_detail, use_container_width=True)
     
-    with tab4:
-        st.markdown(f"## {get_text('performance_corr')}")
+    elif active_tab == 'performance':
+        st.markdown(f"## {T['performance_corr']}")
         
-        corr_fig = create_correlation_heatmap(filtered_data)
+        aggregates = _filter_aggregates(data_key, filtered_data)
+        corr_fig = cached_chart('correlation_heatmap', data_key, filtered_data,
+                                correlation_matrix=aggregates['corr'])
         st.plotly_chart(corr_fig, use_container_width=True)
         
         # 性能分布
         col1, col2 = st.columns(2)
         
         with col1:
-            st.markdown(f"### {get_text('gmv_dist')}")
-            gmv_hist = px.histogram(filtered_data, x='total_gmv', nbins=50, 
-                                   title=get_text('gmv_histogram'))
+            st.markdown(f"### {T['gmv_dist']}")
+            gmv_hist = cached_chart('gmv_histogram', data_key, filtered_data)
             st.plotly_chart(gmv_hist, use_container_width=True)
         
         with col2:
-            st.markdown(f"### {get_text('rating_dist')}")
-            rating_hist = px.histogram(filtered_data, x='avg_review_score', nbins=30,
-                                      title=get_text('rating_histogram'))
+            st.markdown(f"### {T['rating_dist']}")
+            rating_hist = cached_chart('rating_histogram', data_key, filtered_data)
             st.plotly_chart(rating_hist, use_container_width=True)
     
-    with tab5:
-        display_business_insights(filtered_data)
-        
-        # 详细数据表
-        st.markdown(f"### {get_text('filtered_data')}")
-        display_columns = [
-            'seller_id', 'seller_state', 'business_tier', 'total_gmv', 
-            'unique_orders', 'avg_review_score', 'category_count', 'avg_shipping_days'
-        ]
-        
-        st.dataframe(
-            filtered_data[display_columns].sort_values('total_gmv', ascending=False),
-            use_container_width=True
-        )
-        
-        # 数据导出
-        if st.button(get_text('export_csv')):
-            csv = filtered_data.to_csv(index=False)
-            st.download_button(
-                label=get_text('download_csv'),
-                data=csv,
-                file_name=f"olist_filtered_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv"
-            )
+    elif active_tab == 'insights':
+        render_insights_view(filtered_data, metric_cols, data_key)
     
-    with tab6:
-        show_monthly_analysis(data_pipeline)
+    elif active_tab == 'monthly':
+        # 数据管道只有月度分析用到，进入该视图时才创建
+        show_monthly_analysis(DataPipeline(data_path=data_path))
 
     # 页脚
     st.markdown("---")
     st.markdown(f"""
     <div style='text-align: center; color: #666; font-size: 0.9rem;'>
-        {get_text('footer')} | 
-        <a href='https://github.com/Quintas0658/olist_ecommerce_project' style='color: #1f77b4;'>{get_text('github_link')}</a> | 
-        <a href='#' style='color: #1f77b4;'>{get_text('tech_docs')}</a>
+        {T['footer']} | 
+        <a href='https://github.com/Quintas0658/olist_ecommerce_project' style='color: #1f77b4;'>{T['github_link']}</a> | 
+        <a href='#' style='color: #1f77b4;'>{T['tech_docs']}</a>
     </div>
     """, unsafe_allow_html=True)
 
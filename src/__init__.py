@@ -6,14 +6,25 @@ Olist E-commerce Analysis Package
 __version__ = "1.0.0"
 __author__ = "Data Science Team"
 
-from .data_pipeline import DataPipeline
-from .analysis import BusinessAnalyzer
-from .visualization import ChartGenerator
-from .monthly_analysis import MonthlySellerAnalyzer
+# 按需导入：仪表板只用到DataPipeline/MonthlySellerAnalyzer，
+# 避免在启动时连带加载sklearn、matplotlib、seaborn
+_LAZY_IMPORTS = {
+    'DataPipeline': '.data_pipeline',
+    'BusinessAnalyzer': '.analysis',
+    'ChartGenerator': '.visualization',
+    'MonthlySellerAnalyzer': '.monthly_analysis',
+}
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        import importlib
+        module = importlib.import_module(_LAZY_IMPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     'DataPipeline',
     'BusinessAnalyzer', 
     'ChartGenerator',
     'MonthlySellerAnalyzer'
-] 
\ No newline at end of file
+] 
@@ -38,7 +38,7 @@ class BusinessAnalyzer:
         
         # 1. 基于业务规则的分级
         print("   📊 业务规则分级...")
-        df['business_tier'] = df.apply(self._classify_seller_by_rules, axis=1)
+        df['business_tier'] = self._classify_sellers_by_rules(df)
         
         # 2. 基于数据驱动的聚类分级
         print("   🤖 数据驱动聚类分级...")
@@ -49,27 +49,27 @@ class BusinessAnalyzer:
         print("✅ 卖家分级完成")
         return df
     
-    def _classify_seller_by_rules(self, row):
-        """基于业务规则的卖家分级"""
-        gmv = row.get('total_gmv', 0)
-        orders = row.get('unique_orders', 0)
-        rating = row.get('avg_review_score', 0)
-        
-        # 白金卖家：GMV高 + 订单多 + 评分好
-        if gmv >= 50000 and orders >= 200 and rating >= 4.0:
-            return 'Platinum'
-        # 黄金卖家：GMV较高 + 订单较多
-        elif gmv >= 10000 and orders >= 50:
-            return 'Gold'
-        # 银卖家：中等表现
-        elif gmv >= 2000 and orders >= 10:
-            return 'Silver'
-        # 铜卖家：基础表现
-        elif gmv >= 500 and orders >= 3:
-            return 'Bronze'
-        # 基础卖家
-        else:
-            return 'Basic'
+    def _classify_sellers_by_rules(self, df):
+        """基于业务规则的卖家分级（整列向量化，按从高到低的优先级取第一个满足的层级）"""
+        def column(name):
+            return df[name].to_numpy() if name in df.columns else np.zeros(len(df))
+        
+        gmv = column('total_gmv')
+        orders = column('unique_orders')
+        rating = column('avg_review_score')
+        
+        conditions = [
+            # 白金卖家：GMV高 + 订单多 + 评分好
+            (gmv >= 50000) & (orders >= 200) & (rating >= 4.0),
+            # 黄金卖家：GMV较高 + 订单较多
+            (gmv >= 10000) & (orders >= 50),
+            # 银卖家：中等表现
+            (gmv >= 2000) & (orders >= 10),
+            # 铜卖家：基础表现
+            (gmv >= 500) & (orders >= 3),
+        ]
+        # 其余为基础卖家
+        return np.select(conditions, ['Platinum', 'Gold', 'Silver', 'Bronze'], default='Basic')
     
     def _create_cluster_tiers(self, df):
         """基于聚类的卖家分级"""
@@ -125,7 +125,7 @@ class BusinessAnalyzer:
     
     def _create_tier_summary(self, df, tier_column):
         """创建分级汇总表"""
-        summary = df.groupby(tier_column).agg({
+        summary = df.groupby(tier_column, observed=True).agg({
             'seller_id': 'count',
             'total_gmv': ['sum', 'mean', 'median'],
             'unique_orders': ['sum', 'mean'],
@@ -152,10 +152,11 @@ class BusinessAnalyzer:
         total_sellers = len(df)
         total_gmv = df['total_gmv'].sum()
         
-        # 帕累托分析
-        df_sorted = df.sort_values('total_gmv', ascending=False)
+        # 帕累托分析：只需要Top 20%的GMV之和，np.partition做O(N)选择，不对整张表排序
         top_20_pct = int(len(df) * 0.2)
-        top_20_gmv = df_sorted.head(top_20_pct)['total_gmv'].sum()
+        gmv = df['total_gmv'].dropna().to_numpy()
+        k = min(top_20_pct, len(gmv))
+        top_20_gmv = np.partition(gmv, len(gmv) - k)[len(gmv) - k:].sum() if k > 0 else 0.0
         pareto_ratio = top_20_gmv / total_gmv * 100
         
         print(f"   📊 帕累托法则: Top 20%卖家贡献 {pareto_ratio:.1f}% 的GMV")
@@ -222,7 +223,7 @@ class BusinessAnalyzer:
             print("   缺少地域数据")
             return pd.DataFrame()
             
-        geo_analysis = df.groupby('seller_state').agg({
+        geo_analysis = df.groupby('seller_state', observed=True, sort=False).agg({
             'seller_id': 'count',
             'total_gmv': ['sum', 'mean'],
             'avg_review_score': 'mean'
@@ -245,25 +246,34 @@ class BusinessAnalyzer:
             print("   缺少品类数据")
             return {}
             
-        # 多品类vs单品类卖家对比
-        single_category = df[df['category_count'] == 1]
-        multi_category = df[df['category_count'] > 1]
-        
-        print(f"   单品类卖家 ({len(single_category)}个):")
-        print(f"   - 平均GMV: R$ {single_category['total_gmv'].mean():,.0f}")
-        print(f"   - 平均订单: {single_category['unique_orders'].mean():.1f}")
-        
-        print(f"   多品类卖家 ({len(multi_category)}个):")
-        print(f"   - 平均GMV: R$ {multi_category['total_gmv'].mean():,.0f}")
-        print(f"   - 平均订单: {multi_category['unique_orders'].mean():.1f}")
-        
-        if len(multi_category) > 0 and len(single_category) > 0:
-            gmv_uplift = multi_category['total_gmv'].mean() / single_category['total_gmv'].mean()
+        # 多品类vs单品类卖家对比：按品类分组编码一次groupby得到两组的数量和均值
+        metrics = ['total_gmv', 'unique_orders']
+        category_group = np.select(
+            [df['category_count'] == 1, df['category_count'] > 1],
+            ['single', 'multi'],
+            default='other'
+        )
+        grouped = df[metrics].groupby(category_group)
+        counts = grouped.size().reindex(['single', 'multi'], fill_value=0)
+        means = grouped.mean().reindex(['single', 'multi'])
+        single_performance = means.loc['single'].rename(None)
+        multi_performance = means.loc['multi'].rename(None)
+        
+        print(f"   单品类卖家 ({counts['single']}个):")
+        print(f"   - 平均GMV: R$ {single_performance['total_gmv']:,.0f}")
+        print(f"   - 平均订单: {single_performance['unique_orders']:.1f}")
+        
+        print(f"   多品类卖家 ({counts['multi']}个):")
+        print(f"   - 平均GMV: R$ {multi_performance['total_gmv']:,.0f}")
+        print(f"   - 平均订单: {multi_performance['unique_orders']:.1f}")
+        
+        if counts['multi'] > 0 and counts['single'] > 0:
+            gmv_uplift = multi_performance['total_gmv'] / single_performance['total_gmv']
             print(f"   💰 多品类GMV提升倍数: {gmv_uplift:.1f}x")
         
         return {
-            'single_category_performance': single_category[['total_gmv', 'unique_orders']].mean(),
-            'multi_category_performance': multi_category[['total_gmv', 'unique_orders']].mean()
+            'single_category_performance': single_performance,
+            'multi_category_performance': multi_performance
         }
     
     def create_action_plan(self):
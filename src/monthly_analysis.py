@@ -7,7 +7,6 @@
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
 import logging
 from typing import Dict, List, Optional
 import warnings
@@ -131,7 +130,7 @@ class MonthlySellerAnalyzer:
         seller_profile = self._clean_monthly_features(seller_profile)
         
         # 8. 应用分层标准
-        seller_profile['business_tier'] = seller_profile.apply(self._classify_seller, axis=1)
+        seller_profile['business_tier'] = self._classify_sellers(seller_profile)
         
         # 存储月度画像
         self.monthly_profiles[target_month] = seller_profile
@@ -220,12 +219,17 @@ class MonthlySellerAnalyzer:
                 order_details['order_delivered_carrier_date']
             ).dt.days
         
+        # 妥投率 = 已妥投记录的占比：先算成布尔列，聚合时用内置mean，不再对每个卖家调用Python函数
+        order_details['is_delivered'] = order_details['order_status'] == 'delivered'
+        
         # 聚合指标
         ops_metrics = order_details.groupby('seller_id').agg({
             'shipping_days': ['mean', 'median'],
             'delivery_days': ['mean', 'median'],
-            'order_status': lambda x: (x == 'delivered').sum() / len(x) * 100
-        }).round(2)
+            'is_delivered': 'mean'
+        })
+        ops_metrics[('is_delivered', 'mean')] *= 100
+        ops_metrics = ops_metrics.round(2)
         
         ops_metrics.columns = [
             'avg_shipping_days', 'median_shipping_days',
@@ -291,20 +295,24 @@ class MonthlySellerAnalyzer:
         
         return df
     
-    def _classify_seller(self, row):
-        """应用固定的分层标准"""
-        gmv = row.get('total_gmv', 0)
-        orders = row.get('unique_orders', 0)
-        rating = row.get('avg_review_score', 0)
-        
-        # 按层级从高到低检查
-        for tier, criteria in self.tier_definitions.items():
-            if (gmv >= criteria['min_gmv'] and 
-                orders >= criteria['min_orders'] and 
-                rating >= criteria['min_rating']):
-                return tier
-        
-        return 'Basic'
+    def _classify_sellers(self, df):
+        """按固定的分层标准批量分级（缺失的指标列按0处理）"""
+        def column(name):
+            return df[name].to_numpy() if name in df.columns else np.zeros(len(df))
+        
+        gmv = column('total_gmv')
+        orders = column('unique_orders')
+        rating = column('avg_review_score')
+        
+        # np.select取第一个满足的条件，等价于按层级从高到低检查
+        tiers = list(self.tier_definitions)
+        conditions = [
+            (gmv >= criteria['min_gmv']) &
+            (orders >= criteria['min_orders']) &
+            (rating >= criteria['min_rating'])
+            for criteria in self.tier_definitions.values()
+        ]
+        return np.select(conditions, tiers, default='Basic')
     
     def analyze_tier_changes(self, months_list: List[str]):
         """分析多个月份的层级变化"""
@@ -430,6 +438,10 @@ class MonthlySellerAnalyzer:
         # 计算层级变化
         merged['tier_change'] = merged[f'tier_num_{month1}'] - merged[f'tier_num_{month2}']
         
+        # 不带月份后缀的层级列，展示时无需按月份拼接列名
+        merged['previous_tier'] = merged[f'business_tier_{month2}']
+        merged['current_tier'] = merged[f'business_tier_{month1}']
+        
         # 分类卖家
         upgraded_sellers = merged[merged['tier_change'] > 0].copy()
         downgraded_sellers = merged[merged['tier_change'] < 0].copy()
@@ -616,16 +628,21 @@ class MonthlySellerAnalyzer:
             return {}
         
         df = self.monthly_profiles[target_month]
-        active_sellers = df[df['is_active'] == 1]
+        
+        # 活跃掩码只算一次，只取用到的三列，不复制整张活跃卖家表
+        is_active = (df['is_active'] == 1).to_numpy()
+        active_count = int(is_active.sum())
+        active_gmv = df['total_gmv'].to_numpy()[is_active]
+        total_gmv = active_gmv.sum()
         
         summary = {
             'analysis_month': target_month,
             'total_sellers': len(df),
-            'active_sellers': len(active_sellers),
-            'total_gmv': active_sellers['total_gmv'].sum(),
-            'avg_gmv_per_seller': active_sellers['total_gmv'].mean(),
-            'total_orders': active_sellers['unique_orders'].sum(),
-            'avg_rating': active_sellers['avg_review_score'].mean(),
+            'active_sellers': active_count,
+            'total_gmv': total_gmv,
+            'avg_gmv_per_seller': total_gmv / active_count if active_count else np.nan,
+            'total_orders': df['unique_orders'].to_numpy()[is_active].sum(),
+            'avg_rating': df['avg_review_score'][is_active].mean(),
             'tier_distribution': df['business_tier'].value_counts().to_dict()
         }
         
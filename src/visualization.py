@@ -225,7 +225,7 @@ class ChartGenerator:
         
         # 2. 各级别GMV分布
         if 'total_gmv' in seller_data_with_tiers.columns:
-            tier_gmv = seller_data_with_tiers.groupby('business_tier')['total_gmv'].sum().sort_values(ascending=False)
+            tier_gmv = seller_data_with_tiers.groupby('business_tier', observed=True, sort=False)['total_gmv'].sum().sort_values(ascending=False)
             axes[0,1].bar(tier_gmv.index, tier_gmv.values, color='gold', alpha=0.8)
             axes[0,1].set_title('💰 各级别GMV贡献')
             axes[0,1].set_ylabel('GMV总和')
@@ -233,7 +233,7 @@ class ChartGenerator:
         
         # 3. 各级别平均评分
         if 'avg_review_score' in seller_data_with_tiers.columns:
-            tier_rating = seller_data_with_tiers.groupby('business_tier')['avg_review_score'].mean().sort_values(ascending=False)
+            tier_rating = seller_data_with_tiers.groupby('business_tier', observed=True, sort=False)['avg_review_score'].mean().sort_values(ascending=False)
             axes[1,0].bar(tier_rating.index, tier_rating.values, color='lightgreen', alpha=0.8)
             axes[1,0].set_title('⭐ 各级别平均评分')
             axes[1,0].set_ylabel('平均评分')
@@ -241,7 +241,7 @@ class ChartGenerator:
         
         # 4. 各级别平均订单数
         if 'unique_orders' in seller_data_with_tiers.columns:
-            tier_orders = seller_data_with_tiers.groupby('business_tier')['unique_orders'].mean().sort_values(ascending=False)
+            tier_orders = seller_data_with_tiers.groupby('business_tier', observed=True, sort=False)['unique_orders'].mean().sort_values(ascending=False)
             axes[1,1].bar(tier_orders.index, tier_orders.values, color='lightblue', alpha=0.8)
             axes[1,1].set_title('📦 各级别平均订单数')
             axes[1,1].set_ylabel('平均订单数')
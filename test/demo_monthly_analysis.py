@@ -100,22 +100,12 @@ def generate_business_insights(trend_df, flow_matrix, stability_df):
         total_sellers = flow_matrix.loc['All', 'All']
         print(f"   🔄 月度活跃卖家: {total_sellers:,} 个")
         
-        # 升级和降级分析
-        upgrade_count = 0
-        downgrade_count = 0
-        
+        # 升级和降级分析：按层级顺序对齐（去掉All合计行列）后，
+        # 对角线以上为升级、以下为降级
         tier_order = ['Basic', 'Bronze', 'Silver', 'Gold', 'Platinum']
-        for i, tier_from in enumerate(tier_order):
-            if tier_from not in flow_matrix.index:
-                continue
-            for j, tier_to in enumerate(tier_order):
-                if tier_to not in flow_matrix.columns:
-                    continue
-                count = flow_matrix.loc[tier_from, tier_to]
-                if i < j:  # 升级
-                    upgrade_count += count
-                elif i > j:  # 降级
-                    downgrade_count += count
+        fm = flow_matrix.reindex(index=tier_order, columns=tier_order, fill_value=0).to_numpy()
+        upgrade_count = np.triu(fm, 1).sum()
+        downgrade_count = np.tril(fm, -1).sum()
         
         print(f"   ⬆️ 升级卖家: {upgrade_count:,} 个")
         print(f"   ⬇️ 降级卖家: {downgrade_count:,} 个")